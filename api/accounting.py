@@ -0,0 +1,143 @@
+import os
+import logging
+import itertools
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# USD per million (prompt, completion) tokens; models not listed are free (local, stub).
+PRICES_PER_MILLION = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00)
+}
+
+# Fraction of a budget after which api_handler switches to the cheaper fallbacks.
+LOW_BUDGET_FRACTION = 0.8
+
+
+def _empty_totals():
+    return {
+        "calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cost": 0.0,
+        "latency": 0.0,
+        "by_call_type": {}
+    }
+
+
+def _add(totals, call_type, prompt_tokens, completion_tokens, cost, latency):
+    totals["calls"] += 1
+    totals["prompt_tokens"] += prompt_tokens
+    totals["completion_tokens"] += completion_tokens
+    totals["cost"] += cost
+    totals["latency"] += latency
+    totals["by_call_type"][call_type] = totals["by_call_type"].get(call_type, 0) + 1
+
+
+class LLMAccountant:
+    """
+    Records every LLM call (tokens, cost, latency, call type, game id) and aggregates
+    them per game and for the whole session. Only the last `recent_calls` calls are kept
+    individually (in calls); the totals cover all of them.
+
+    Budgets are per game: a maximum number of tokens (prompt + completion) and of calls.
+    A value of 0 disables that budget.
+    Recording is thread safe, so concurrent games (e.g. self-play) can share one accountant.
+    """
+
+    def __init__(self, game_token_budget=20000, game_call_budget=40, recent_calls=200):
+        self.game_token_budget = game_token_budget
+        self.game_call_budget = game_call_budget
+        self.calls = deque(maxlen=recent_calls)
+        self.games = {}
+        self.session = _empty_totals()
+        self._game_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start_game(self, kind):
+        """
+        Registers a new game and returns its id, e.g. "robot_guesses-1".
+        """
+        with self._lock:
+            game_id = f"{kind}-{next(self._game_ids)}"
+            self.games[game_id] = _empty_totals()
+        return game_id
+
+    def record(self, call_type, response, game_id=None):
+        """
+        Records one completion as returned by LLMBackend.complete().
+        """
+        usage = response.get("usage", {})
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        prompt_price, completion_price = PRICES_PER_MILLION.get(response.get("model"), (0.0, 0.0))
+        cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+        latency = response.get("latency", 0.0)
+
+        with self._lock:
+            self.calls.append({
+                "call_type": call_type,
+                "game_id": game_id,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost": cost,
+                "latency": latency
+            })
+            _add(self.session, call_type, prompt_tokens, completion_tokens, cost, latency)
+            if game_id is not None:
+                totals = self.games.setdefault(game_id, _empty_totals())
+                _add(totals, call_type, prompt_tokens, completion_tokens, cost, latency)
+        logger.debug("LLM %s call (game %s): %d prompt + %d completion tokens, %.2f s",
+                     call_type, game_id, prompt_tokens, completion_tokens, latency)
+
+    def game_totals(self, game_id):
+        return self.games.get(game_id, _empty_totals())
+
+    def budget_state(self, game_id):
+        """
+        Returns "ok", "low" (past LOW_BUDGET_FRACTION of a budget) or "exhausted".
+        """
+        if game_id is None:
+            return "ok"
+        totals = self.game_totals(game_id)
+        used = 0.0
+        if self.game_token_budget:
+            tokens = totals["prompt_tokens"] + totals["completion_tokens"]
+            used = max(used, tokens / self.game_token_budget)
+        if self.game_call_budget:
+            used = max(used, totals["calls"] / self.game_call_budget)
+        if used >= 1.0:
+            return "exhausted"
+        if used >= LOW_BUDGET_FRACTION:
+            return "low"
+        return "ok"
+
+    def log_game_summary(self, game_id):
+        totals = self.game_totals(game_id)
+        logger.info("Game %s used %d LLM calls, %d prompt + %d completion tokens, $%.5f, %.2f s %s",
+                    game_id, totals["calls"], totals["prompt_tokens"], totals["completion_tokens"],
+                    totals["cost"], totals["latency"], totals["by_call_type"])
+
+
+_accountant = None
+
+
+def get_accountant():
+    """
+    Returns the shared accountant. Budgets come from LLM_GAME_TOKEN_BUDGET and
+    LLM_GAME_CALL_BUDGET (.env or environment).
+    """
+    global _accountant
+    if _accountant is None:
+        _accountant = LLMAccountant(
+            game_token_budget=int(os.getenv("LLM_GAME_TOKEN_BUDGET", "20000")),
+            game_call_budget=int(os.getenv("LLM_GAME_CALL_BUDGET", "40"))
+        )
+    return _accountant
+
+
+def set_accountant(accountant):
+    global _accountant
+    _accountant = accountant
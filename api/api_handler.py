@@ -1,34 +1,56 @@
 import re
+import random
 import logging
-from openai import OpenAI
-from .conn import chat_gtp_connection
+from .backends import get_backend
+from .accounting import get_accountant
+from .conversation import GuessConversation
+from .opening_book import get_opening_book
 
 logger = logging.getLogger(__name__)
 
-def build_prompt(previous_guesses, last_user_input):
+# Rounds sent to the model once a game's LLM budget runs low.
+LOW_BUDGET_HISTORY = 3
+
+# Local fallbacks used when a game's LLM budget is exhausted.
+FALLBACK_QUESTIONS = [
+    "Is it an animal?",
+    "Is it alive?",
+    "Is it bigger than a chair?",
+    "Can you find it in a house?",
+    "Can you eat it?",
+    "Is it used outside?",
+    "Is it made of metal?",
+    "Can you hold it in your hand?",
+    "Is it a toy?",
+    "Does it make a sound?"
+]
+FALLBACK_WORDS = ["apple", "house", "tiger", "pencil", "garden", "banana", "rabbit", "bottle"]
+
+SECRET_WORD_PROMPT = (
+    "Please choose one simple, common English word (preferably 4-8 letters) that is not too complex, "
+    "and output only the word."
+)
+
+# Request parameters per call type; shared with the asyncio handlers in async_api_handler.
+GUESS_PARAMS = {"max_tokens": 200, "temperature": 0.8, "call_type": "guess"}
+ANSWER_PARAMS = {"max_tokens": 20, "temperature": 0, "call_type": "answer"}
+SECRET_WORD_PARAMS = {"max_tokens": 10, "temperature": 0.5, "call_type": "secret_word"}
+
+
+def complete(messages, max_tokens, temperature, call_type, game_id=None):
     """
-    Build the prompt using previous rounds and the latest user response.
-    The output should be delimited by <<< and >>>.
+    Runs one completion on the configured backend and records it in the accountant.
+    Returns the completion text.
     """
-    prompt = (
-        "You are a guessing game assistant. The player is thinking of a word, "
-        "and your goal is to guess it by asking yes/no questions. "
-        "Use the feedback from previous rounds to refine your questions.\n\n"
-        "Previous rounds:\n"
+    response = get_backend().complete(
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        call_type=call_type
     )
-    if previous_guesses:
-        for idx, entry in enumerate(previous_guesses, start=1):
-            prompt += f"{idx}. Question: {entry['guess']} | Feedback: {entry['feedback']}\n"
-    else:
-        prompt += "None\n"
-    if last_user_input:
-        prompt += f"\nThe latest user response was: \"{last_user_input}\"\n"
-    prompt += (
-        "\nBased on this context, propose your next yes/no question to narrow down the word. "
-        "Output only the question enclosed between <<< and >>>. For example:\n"
-        "<<<Is it an animal?>>>\n"
-    )
-    return prompt
+    get_accountant().record(call_type, response, game_id)
+    return response["text"]
+
 
 def parse_response(response_text):
     """
@@ -39,23 +61,93 @@ def parse_response(response_text):
         return match.group(1).strip()
     return response_text.strip()
 
-def guess(last_user_input, previous_guesses):
+def fallback_question(previous_guesses):
+    """
+    First question of FALLBACK_QUESTIONS that was not asked yet.
+    """
+    asked = {entry['guess'] for entry in previous_guesses}
+    remaining = [q for q in FALLBACK_QUESTIONS if q not in asked]
+    return remaining[0] if remaining else "Can you give me a hint?"
+
+
+def book_question(previous_guesses):
     """
-    Calls the ChatGPT API with a templated prompt to generate the next guess.
+    Question from the opening book for this history, or None if the history left the book.
+    """
+    book = get_opening_book()
+    if book is None:
+        return None
+    question = book.lookup(previous_guesses)
+    if question:
+        logger.debug("Opening book question: %s", question)
+    return question
+
+
+def guess_messages(previous_guesses, budget, conversation=None):
+    """
+    Brings the game's conversation up to date and returns its messages.
+    On a low budget, the conversation is trimmed to the last rounds.
+    """
+    if conversation is None:
+        conversation = GuessConversation()
+    conversation.sync(previous_guesses)
+    if budget == "low":
+        conversation.trim(LOW_BUDGET_HISTORY)
+    logger.debug("Guess conversation: %d messages", len(conversation.messages))
+    return conversation.messages
+
+
+def answer_prompt(chosen_word, question):
+    return (
+        f"The secret word is '{chosen_word}'.\n"
+        f"Answer the following question with only 'yes' or 'no':\n"
+        f"Question: {question}\n"
+    )
+
+
+def classify_answer(raw_response):
+    """
+    Maps a raw answer to "yes", "no" or "I don't know".
+    """
+    if "yes" in raw_response:
+        return "yes"
+    elif "no" in raw_response:
+        return "no"
+    else:
+        return "I don't know"
+
+
+def local_answer(chosen_word, question):
+    """
+    Answer without the LLM, used once the budget is exhausted.
+    """
+    return "yes" if chosen_word.lower() in question.lower() else "I don't know"
+
+
+def guess(last_user_input, previous_guesses, game_id=None, conversation=None):
+    """
+    Calls the configured LLM backend with the game's chat history to generate the next guess.
     Silences extra HTTP debugging and handles errors.
+
+    conversation is the game's GuessConversation; the rounds in previous_guesses it does
+    not have yet are appended, so the history is never rebuilt. The latest user response
+    is the feedback of the last round; last_user_input is kept for compatibility.
+    Without a conversation, a fresh one is built from previous_guesses.
+
+    While the history is in the opening book, the book's question is returned without an LLM call.
+    When the game's LLM budget runs low, only the last LOW_BUDGET_HISTORY rounds are sent;
+    when it is exhausted, a question from FALLBACK_QUESTIONS is asked instead.
     """
+    question = book_question(previous_guesses)
+    if question:
+        return question
+    budget = get_accountant().budget_state(game_id)
+    if budget == "exhausted":
+        logger.debug("LLM budget exhausted for game %s; using a fallback question.", game_id)
+        return fallback_question(previous_guesses)
     try:
-        api_key = chat_gtp_connection()
-        client = OpenAI(api_key=api_key)
-        prompt = build_prompt(previous_guesses, last_user_input)
-        logger.debug("Built prompt for guess: %s", prompt)
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="gpt-4o-mini",
-            max_tokens=200,
-            temperature=0.8
-        )
-        raw_response = response.choices[0].message.content.strip()
+        messages = guess_messages(previous_guesses, budget, conversation)
+        raw_response = complete(messages=messages, game_id=game_id, **GUESS_PARAMS).strip()
         logger.debug("Raw response from ChatGPT: %s", raw_response)
         return parse_response(raw_response)
     except Exception as e:
@@ -63,66 +155,48 @@ def guess(last_user_input, previous_guesses):
         return "I'm sorry, I couldn't generate a question."
 
 
-def answer_question_with_api(chosen_word, question):
+def answer_question_with_api(chosen_word, question, game_id=None):
     """
-    Uses the ChatGPT API to answer a yes/no question about the chosen word.
+    Uses the configured LLM backend to answer a yes/no question about the chosen word.
     The prompt tells the model the secret word and asks it to respond only "yes" or "no."
+    When the game's LLM budget is exhausted, only questions naming the word get a "yes".
 
     :param chosen_word: The secret word.
     :param question: The user's yes/no question.
+    :param game_id: Game id from the accountant, used for accounting and budgets.
     :return: "yes" or "no" (or "I don't know" on error).
     """
+    if get_accountant().budget_state(game_id) == "exhausted":
+        logger.debug("LLM budget exhausted for game %s; answering locally.", game_id)
+        return local_answer(chosen_word, question)
     try:
-        api_key = chat_gtp_connection()
-        client = OpenAI(api_key=api_key)
-        prompt = (
-            f"The secret word is '{chosen_word}'.\n"
-            f"Answer the following question with only 'yes' or 'no':\n"
-            f"Question: {question}\n"
-        )
+        prompt = answer_prompt(chosen_word, question)
         logger.debug("Built prompt for answer: %s", prompt)
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="gpt-4o-mini",
-            max_tokens=20,
-            temperature=0
-        )
-        raw_response = response.choices[0].message.content.strip().lower()
+        raw_response = complete(
+            messages=[{"role": "user", "content": prompt}], game_id=game_id, **ANSWER_PARAMS
+        ).strip().lower()
         logger.debug("Raw answer response: %s", raw_response)
-        if "yes" in raw_response:
-            return "yes"
-        elif "no" in raw_response:
-            return "no"
-        else:
-            return "I don't know"
+        return classify_answer(raw_response)
     except Exception as e:
         logger.error("Error in answer_question_with_api: %s", e)
         return "I don't know"
 
 
-def generate_secret_word():
+def generate_secret_word(game_id=None):
     """
-    Uses the ChatGPT API to generate a simple secret word.
+    Uses the configured LLM backend to generate a simple secret word.
     The prompt instructs the model to choose one common word.
     """
+    if get_accountant().budget_state(game_id) == "exhausted":
+        return random.choice(FALLBACK_WORDS)
     try:
-        api_key = chat_gtp_connection()
-        client = OpenAI(api_key=api_key)
-        prompt = (
-            "Please choose one simple, common English word (preferably 4-8 letters) that is not too complex, "
-            "and output only the word."
-        )
-        logger.debug("Built prompt for secret word: %s", prompt)
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="gpt-4o-mini",
-            max_tokens=10,
-            temperature=0.5
-        )
-        word = response.choices[0].message.content.strip().lower()
+        logger.debug("Built prompt for secret word: %s", SECRET_WORD_PROMPT)
+        word = complete(
+            messages=[{"role": "user", "content": SECRET_WORD_PROMPT}], game_id=game_id, **SECRET_WORD_PARAMS
+        ).strip().lower()
         logger.debug("Generated secret word: %s", word)
         return word
     except Exception as e:
         logger.error("Error in generate_secret_word: %s", e)
         # Fallback to a random word from a hardcoded list.
-        return "apple"
\ No newline at end of file
+        return random.choice(FALLBACK_WORDS)
\ No newline at end of file
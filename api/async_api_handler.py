@@ -0,0 +1,89 @@
+import random
+import logging
+from .backends import get_backend
+from .accounting import get_accountant
+from .api_handler import (
+    FALLBACK_WORDS, SECRET_WORD_PROMPT, GUESS_PARAMS, ANSWER_PARAMS, SECRET_WORD_PARAMS,
+    book_question, fallback_question, guess_messages, answer_prompt, classify_answer, local_answer, parse_response
+)
+
+# asyncio counterparts of the api_handler functions. Prompts, budgets and parsing are
+# shared with api_handler; only the backend call is awaited.
+
+logger = logging.getLogger(__name__)
+
+
+async def complete(messages, max_tokens, temperature, call_type, game_id=None):
+    """
+    Runs one completion on the configured backend and records it in the accountant.
+    Returns the completion text.
+    """
+    response = await get_backend().acomplete(
+        messages=messages,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        call_type=call_type
+    )
+    get_accountant().record(call_type, response, game_id)
+    return response["text"]
+
+
+async def guess(last_user_input, previous_guesses, game_id=None, conversation=None):
+    """
+    See api_handler.guess.
+    """
+    question = book_question(previous_guesses)
+    if question:
+        return question
+    budget = get_accountant().budget_state(game_id)
+    if budget == "exhausted":
+        logger.debug("LLM budget exhausted for game %s; using a fallback question.", game_id)
+        return fallback_question(previous_guesses)
+    try:
+        messages = guess_messages(previous_guesses, budget, conversation)
+        raw_response = (await complete(messages=messages, game_id=game_id, **GUESS_PARAMS)).strip()
+        logger.debug("Raw response from ChatGPT: %s", raw_response)
+        return parse_response(raw_response)
+    except Exception as e:
+        logger.error("Error in guess call: %s", e)
+        return "I'm sorry, I couldn't generate a question."
+
+
+async def answer_question_with_api(chosen_word, question, game_id=None):
+    """
+    See api_handler.answer_question_with_api.
+    """
+    if get_accountant().budget_state(game_id) == "exhausted":
+        logger.debug("LLM budget exhausted for game %s; answering locally.", game_id)
+        return local_answer(chosen_word, question)
+    try:
+        prompt = answer_prompt(chosen_word, question)
+        logger.debug("Built prompt for answer: %s", prompt)
+        raw_response = await complete(
+            messages=[{"role": "user", "content": prompt}], game_id=game_id, **ANSWER_PARAMS
+        )
+        raw_response = raw_response.strip().lower()
+        logger.debug("Raw answer response: %s", raw_response)
+        return classify_answer(raw_response)
+    except Exception as e:
+        logger.error("Error in answer_question_with_api: %s", e)
+        return "I don't know"
+
+
+async def generate_secret_word(game_id=None):
+    """
+    See api_handler.generate_secret_word.
+    """
+    if get_accountant().budget_state(game_id) == "exhausted":
+        return random.choice(FALLBACK_WORDS)
+    try:
+        word = await complete(
+            messages=[{"role": "user", "content": SECRET_WORD_PROMPT}], game_id=game_id, **SECRET_WORD_PARAMS
+        )
+        word = word.strip().lower()
+        logger.debug("Generated secret word: %s", word)
+        return word
+    except Exception as e:
+        logger.error("Error in generate_secret_word: %s", e)
+        # Fallback to a random word from a hardcoded list.
+        return random.choice(FALLBACK_WORDS)
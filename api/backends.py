@@ -0,0 +1,265 @@
+import os
+import re
+import abc
+import time
+import asyncio
+import logging
+import threading
+from openai import OpenAI, AsyncOpenAI
+from .conn import chat_gtp_connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPENAI_MODEL = "gpt-4o-mini"
+DEFAULT_LOCAL_URL = "http://localhost:8080/v1"
+
+
+class LLMBackend(abc.ABC):
+    """
+    Base class for the chat completion backends used by api_handler.
+
+    Subclasses implement _create(), which returns a dict:
+        {"text": <completion text>, "usage": {"prompt_tokens": int, "completion_tokens": int}}
+    complete() wraps it, adds "model" and "latency" (seconds) and keeps latency metrics per backend.
+    acomplete() is the asyncio counterpart; it runs _acreate(), which by default runs
+    _create() in a worker thread.
+    """
+    name = "base"
+    model = None
+
+    def __init__(self):
+        self.metrics = {
+            "calls": 0,
+            "errors": 0,
+            "total_latency": 0.0,
+            "max_latency": 0.0,
+            "last_latency": 0.0
+        }
+        # complete() runs in worker threads (deferToThread, self-play).
+        self._metrics_lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _create(self, messages, max_tokens, temperature, call_type):
+        pass
+
+    async def _acreate(self, messages, max_tokens, temperature, call_type):
+        return await asyncio.to_thread(self._create, messages, max_tokens, temperature, call_type)
+
+    def _record_latency(self, latency, failed):
+        with self._metrics_lock:
+            if failed:
+                self.metrics["errors"] += 1
+            self.metrics["calls"] += 1
+            self.metrics["total_latency"] += latency
+            self.metrics["max_latency"] = max(self.metrics["max_latency"], latency)
+            self.metrics["last_latency"] = latency
+
+    def complete(self, messages, max_tokens=200, temperature=0.8, call_type="chat"):
+        """
+        Runs one chat completion.
+
+        :param messages: OpenAI style list of {"role": ..., "content": ...} dicts.
+        :param max_tokens: Maximum number of completion tokens.
+        :param temperature: Sampling temperature.
+        :param call_type: "guess", "answer" or "secret_word"; used by the stub and the metrics.
+        :return: dict with "text" and "usage" (see class docstring).
+        """
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = self._create(messages, max_tokens, temperature, call_type)
+            failed = False
+        finally:
+            latency = time.perf_counter() - start
+            self._record_latency(latency, failed)
+        logger.debug("%s backend %s call took %.3f s", self.name, call_type, latency)
+        result["model"] = self.model
+        result["latency"] = latency
+        return result
+
+    async def acomplete(self, messages, max_tokens=200, temperature=0.8, call_type="chat"):
+        """
+        Same as complete(), for the asyncio stack.
+        """
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = await self._acreate(messages, max_tokens, temperature, call_type)
+            failed = False
+        finally:
+            latency = time.perf_counter() - start
+            self._record_latency(latency, failed)
+        logger.debug("%s backend %s call took %.3f s", self.name, call_type, latency)
+        result["model"] = self.model
+        result["latency"] = latency
+        return result
+
+    def latency_summary(self):
+        """
+        Returns the metrics plus the mean latency in seconds.
+        """
+        with self._metrics_lock:
+            summary = dict(self.metrics)
+        calls = summary["calls"]
+        summary["backend"] = self.name
+        summary["mean_latency"] = summary["total_latency"] / calls if calls else 0.0
+        return summary
+
+
+class OpenAIBackend(LLMBackend):
+    """
+    The hosted OpenAI API. The client is created once and reused for every call;
+    the native async client is created on first use by the asyncio stack.
+    """
+    name = "openai"
+
+    def __init__(self, api_key, model=DEFAULT_OPENAI_MODEL, base_url=None):
+        super().__init__()
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.async_client = None
+
+    def _create(self, messages, max_tokens, temperature, call_type):
+        response = self.client.chat.completions.create(
+            messages=messages,
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return self._to_result(response)
+
+    async def _acreate(self, messages, max_tokens, temperature, call_type):
+        if self.async_client is None:
+            self.async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+        response = await self.async_client.chat.completions.create(
+            messages=messages,
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return self._to_result(response)
+
+    @staticmethod
+    def _to_result(response):
+        usage = response.usage
+        return {
+            "text": response.choices[0].message.content or "",
+            "usage": {
+                "prompt_tokens": usage.prompt_tokens if usage else 0,
+                "completion_tokens": usage.completion_tokens if usage else 0
+            }
+        }
+
+
+class LocalHTTPBackend(OpenAIBackend):
+    """
+    An OpenAI-compatible server on the lab machine (e.g. llama.cpp's `llama-server`).
+    Local servers ignore the api key, but the client requires one.
+    """
+    name = "local"
+
+    def __init__(self, base_url=DEFAULT_LOCAL_URL, model="local", api_key="not-needed"):
+        super().__init__(api_key=api_key, model=model, base_url=base_url)
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic in-process backend for testing without network.
+    - guess: asks the QUESTIONS in order, based on how many rounds the conversation holds,
+      so concurrent games do not influence each other. They are generic and never name a
+      word, so the stub only exercises the game and harness plumbing (e.g. self-play as a
+      smoke test); its win rate says nothing about a question strategy.
+    - answer: "yes" if the secret word occurs in the question, otherwise "no".
+    - secret_word: cycles through a fixed word list.
+    Usage is estimated as one token per 4 characters.
+    """
+    name = "stub"
+
+    QUESTIONS = [
+        "Is it an animal?",
+        "Is it alive?",
+        "Can you eat it?",
+        "Is it used indoors?",
+        "Is it made of metal?",
+        "Can you hold it in your hand?",
+        "Does it make a sound?"
+    ]
+    WORDS = ["apple", "house", "tiger", "pencil", "garden"]
+
+    def __init__(self):
+        super().__init__()
+        self.counters = {}
+
+    def _next(self, call_type):
+        index = self.counters.get(call_type, 0)
+        self.counters[call_type] = index + 1
+        return index
+
+    async def _acreate(self, messages, max_tokens, temperature, call_type):
+        # No I/O, so no worker thread is needed.
+        return self._create(messages, max_tokens, temperature, call_type)
+
+    def _create(self, messages, max_tokens, temperature, call_type):
+        prompt = messages[-1]["content"] if messages else ""
+        if call_type == "guess":
+            # Asked questions are assistant turns, or numbered lines of a compacted summary.
+            asked = sum(1 for m in messages if m["role"] == "assistant")
+            asked += sum(len(re.findall(r"^\d+\. Question:", m["content"], re.M))
+                         for m in messages if m["role"] == "user")
+            text = f"<<<{self.QUESTIONS[asked % len(self.QUESTIONS)]}>>>"
+        elif call_type == "answer":
+            match = re.search(r"secret word is '(.*?)'", prompt)
+            question = prompt.split("Question:", 1)[-1].lower()
+            text = "yes" if match and match.group(1).lower() in question else "no"
+        elif call_type == "secret_word":
+            text = self.WORDS[self._next(call_type) % len(self.WORDS)]
+        else:
+            text = ""
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        return {
+            "text": text,
+            "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(text) // 4}
+        }
+
+
+def create_backend(kind=None):
+    """
+    Creates the backend selected by the LLM_BACKEND setting (.env or environment):
+    - "openai" (default): uses CHATGTP_API as key and LLM_MODEL (default gpt-4o-mini).
+    - "local": uses LLM_BASE_URL (default http://localhost:8080/v1) and LLM_MODEL.
+    - "stub": deterministic, no network.
+    """
+    kind = (kind or os.getenv("LLM_BACKEND", "openai")).lower()
+    if kind == "openai":
+        return OpenAIBackend(api_key=chat_gtp_connection(),
+                             model=os.getenv("LLM_MODEL", DEFAULT_OPENAI_MODEL))
+    if kind == "local":
+        return LocalHTTPBackend(base_url=os.getenv("LLM_BASE_URL", DEFAULT_LOCAL_URL),
+                                model=os.getenv("LLM_MODEL", "local"))
+    if kind == "stub":
+        return StubBackend()
+    raise ValueError(f"Unknown LLM_BACKEND '{kind}'")
+
+
+_backend = None
+
+
+def get_backend():
+    """
+    Returns the shared backend, creating it from the configuration on first use.
+    """
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+        logger.debug("Using LLM backend: %s", _backend.name)
+    return _backend
+
+
+def set_backend(backend):
+    """
+    Replaces the shared backend (e.g. with a StubBackend in a test script).
+    """
+    global _backend
+    _backend = backend
@@ -14,10 +14,12 @@ def find_dotenv():
             return potential_env_path
         current_dir = os.path.abspath(os.path.join(current_dir, os.pardir))
 
-    raise FileNotFoundError("Could not find the .env file")
+    # No .env: the settings come from the environment (e.g. LLM_BACKEND=stub needs no key).
+    return None
 
 dotenv_path = find_dotenv()
-load_dotenv(dotenv_path, override=True)
+if dotenv_path:
+    load_dotenv(dotenv_path, override=True)
 
 def chat_gtp_connection():
     return os.getenv('CHATGTP_API')
\ No newline at end of file
@@ -0,0 +1,86 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = (
+    "You are a guessing game assistant. The player is thinking of a word, "
+    "and your goal is to guess it by asking yes/no questions. "
+    "Each user message contains the player's feedback to your last question; "
+    "use all feedback so far to refine your questions.\n"
+    "Output only the next question enclosed between <<< and >>>. For example:\n"
+    "<<<Is it an animal?>>>"
+)
+START_MESSAGE = "I am thinking of a word. Ask your first yes/no question."
+
+
+class GuessConversation:
+    """
+    Persistent chat history of one robot_guesses game.
+
+    Every round only appends messages (the question as assistant turn and the feedback as
+    user turn), so consecutive guess() calls share their whole prefix and the provider's
+    prompt cache (or the KV cache of a local server) can reuse it.
+
+    With compact_after=N (or LLM_COMPACT_AFTER), once more than N rounds are stored as
+    separate turns, they are folded into one summary message. This changes the prefix only
+    at that moment, after which the history grows incrementally again.
+
+    trim(keep_rounds) drops the oldest rounds in place when the budget runs low.
+    """
+
+    def __init__(self, compact_after=None):
+        if compact_after is None:
+            compact_after = int(os.getenv("LLM_COMPACT_AFTER", "0"))
+        self.compact_after = compact_after
+        self.rounds = []
+        self.compacted_rounds = 0
+        self.messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": START_MESSAGE}
+        ]
+
+    def add_round(self, question, feedback):
+        self.rounds.append((question, feedback))
+        self.messages.append({"role": "assistant", "content": f"<<<{question}>>>"})
+        self.messages.append({"role": "user", "content": f"Feedback: {feedback}"})
+        if self.compact_after and len(self.rounds) - self.compacted_rounds > self.compact_after:
+            self.compact()
+
+    def sync(self, previous_guesses):
+        """
+        Appends the rounds of previous_guesses ({'guess': ..., 'feedback': ...} entries)
+        that are not in the conversation yet.
+        """
+        for entry in previous_guesses[len(self.rounds):]:
+            self.add_round(entry['guess'], entry['feedback'])
+
+    def compact(self):
+        """
+        Replaces all rounds by a single summary message after the system prompt.
+        """
+        if len(self.rounds) == self.compacted_rounds:
+            return
+        lines = [f"{idx}. Question: {question} | Feedback: {feedback}"
+                 for idx, (question, feedback) in enumerate(self.rounds, start=1)]
+        summary = (
+            "I am thinking of a word. Previous rounds:\n"
+            + "\n".join(lines)
+            + "\nAsk your next yes/no question."
+        )
+        self.messages = [self.messages[0], {"role": "user", "content": summary}]
+        self.compacted_rounds = len(self.rounds)
+        logger.debug("Compacted %d rounds into a summary message.", self.compacted_rounds)
+
+    def trim(self, keep_rounds):
+        """
+        Keeps only the last `keep_rounds` rounds as turns, after the start message (or the
+        compaction summary, which is always kept). Trims whenever more rounds are stored
+        as turns; the dropped rounds count as compacted.
+        """
+        turns = len(self.rounds) - self.compacted_rounds
+        if turns <= keep_rounds:
+            return
+        self.messages = self.messages[:2] + (self.messages[-2 * keep_rounds:] if keep_rounds else [])
+        self.compacted_rounds = len(self.rounds) - keep_rounds
+        logger.debug("Trimmed the conversation to the last %d rounds.", keep_rounds)
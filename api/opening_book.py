@@ -0,0 +1,246 @@
+import os
+import re
+import json
+import logging
+import argparse
+import threading
+
+from game_control.game_logic import NO_RESPONSE
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+# Robot_guesses games are appended here (one JSON object per line) to build the book from.
+GAME_LOG_FILE = os.path.join(ROOT_DIR, "logs", "games.jsonl")
+OPENING_BOOK_FILE = os.path.join(ROOT_DIR, "opening_book.json")
+
+YES_WORDS = {"yes", "yeah", "yep", "yup", "correct", "right", "sure"}
+NO_WORDS = {"no", "nope", "not", "nah"}
+
+_log_lock = threading.Lock()
+
+
+def normalize_question(question):
+    """
+    Lower case, no punctuation, single spaces: "Is it an animal?" -> "is it an animal".
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+
+def classify_feedback(feedback):
+    """
+    Maps free-form feedback to "yes", "no" or "other". The NO_RESPONSE the games record
+    for a round without an answer is "other", not "no".
+    """
+    normalized = normalize_question(feedback)
+    if normalized == normalize_question(NO_RESPONSE):
+        return "other"
+    words = set(normalized.split())
+    if words & YES_WORDS and not words & NO_WORDS:
+        return "yes"
+    if words & NO_WORDS and not words & YES_WORDS:
+        return "no"
+    return "other"
+
+
+def round_key(question, feedback):
+    """
+    Key of one round in the book: "normalized question|classified feedback".
+    Building and lookup both use it, so logged games and live games map to the same keys.
+    """
+    return f"{normalize_question(question)}|{classify_feedback(feedback)}"
+
+
+def history_key(previous_guesses):
+    """
+    Normalized history: a tuple of round keys.
+    """
+    return tuple(round_key(entry['guess'], entry['feedback']) for entry in previous_guesses)
+
+
+def record_game(previous_guesses, won, path=None):
+    """
+    Appends a finished robot_guesses game to the game log.
+    """
+    path = path or os.getenv("GAME_LOG_FILE", GAME_LOG_FILE)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        line = json.dumps({"rounds": previous_guesses, "won": won})
+        with _log_lock, open(path, "a") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        logger.error("Could not log game: %s", e)
+
+
+def load_games(path):
+    games = []
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                games.append(json.loads(line)["rounds"])
+    return games
+
+
+def _prune(node):
+    """
+    Removes the children that lead to no book question. Returns True if node is empty.
+    """
+    for key in list(node["children"]):
+        if _prune(node["children"][key]):
+            del node["children"][key]
+    return node["question"] is None and not node["children"]
+
+
+class OpeningBook:
+    """
+    Prefix trie over normalized game histories. Each node stores the question to ask
+    next; its children are keyed by the normalized (question, feedback) of that round.
+
+    Built from logged games, keeping only questions asked at least min_count times at
+    that point of the game and at most max_entries nodes (shallow ones first, since
+    the opening rounds are the ones that repeat).
+    """
+
+    def __init__(self, root=None):
+        self.root = root or {"question": None, "children": {}}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def build(cls, games, min_count=3, max_entries=500):
+        counts = {"questions": {}, "children": {}}
+        for rounds in games:
+            node = counts
+            for entry in rounds:
+                question = entry['guess']
+                node["questions"][question] = node["questions"].get(question, 0) + 1
+                key = round_key(question, entry['feedback'])
+                node = node["children"].setdefault(key, {"questions": {}, "children": {}})
+
+        root = {"question": None, "children": {}}
+        entries = 0
+        level = [(counts, root)]
+        while level and entries < max_entries:
+            next_level = []
+            for count_node, book_node in level:
+                if entries >= max_entries:
+                    break
+                if not count_node["questions"]:
+                    continue
+                question, count = max(count_node["questions"].items(), key=lambda item: item[1])
+                if count < min_count:
+                    continue
+                book_node["question"] = question
+                entries += 1
+                prefix = normalize_question(question) + "|"
+                for key, child in count_node["children"].items():
+                    # Only follow the rounds in which the book's question was asked.
+                    if key.startswith(prefix):
+                        book_child = {"question": None, "children": {}}
+                        book_node["children"][key] = book_child
+                        next_level.append((child, book_child))
+            level = next_level
+        _prune(root)
+        logger.debug("Built opening book with %d entries from %d games.", entries, len(games))
+        return cls(root)
+
+    def lookup(self, previous_guesses):
+        """
+        Returns the book question for this history, or None once the history leaves the book.
+        """
+        node = self.root
+        for key in history_key(previous_guesses):
+            node = node["children"].get(key)
+            if node is None:
+                self.misses += 1
+                return None
+        if node["question"] is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return node["question"]
+
+    def entries(self):
+        """
+        Number of book questions.
+        """
+        count, nodes = 0, [self.root]
+        while nodes:
+            node = nodes.pop()
+            count += node["question"] is not None
+            nodes.extend(node["children"].values())
+        return count
+
+    def coverage(self, games):
+        """
+        Replays logged games: returns (rounds served from the book, rounds). A round counts
+        if the book had the question that was asked, which checks that the rounds logged
+        by record_game map to the keys lookup() walks.
+        """
+        served = total = 0
+        for rounds in games:
+            node = self.root
+            for entry in rounds:
+                total += 1
+                if node is None or node["question"] is None:
+                    node = None
+                    continue
+                served += normalize_question(node["question"]) == normalize_question(entry['guess'])
+                node = node["children"].get(round_key(entry['guess'], entry['feedback']))
+        return served, total
+
+    def stats(self):
+        return {"entries": self.entries(), "hits": self.hits, "misses": self.misses}
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.root, f, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+
+_book = None
+_book_loaded = False
+
+
+def get_opening_book():
+    """
+    Returns the opening book from OPENING_BOOK_FILE, or None if there is none.
+    """
+    global _book, _book_loaded
+    if not _book_loaded:
+        _book_loaded = True
+        path = os.getenv("OPENING_BOOK_FILE", OPENING_BOOK_FILE)
+        if os.path.isfile(path):
+            _book = OpeningBook.load(path)
+            logger.debug("Loaded opening book from %s", path)
+    return _book
+
+
+def set_opening_book(book):
+    global _book, _book_loaded
+    _book = book
+    _book_loaded = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the opening book from logged games.")
+    parser.add_argument("--games", default=GAME_LOG_FILE, help="game log (jsonl)")
+    parser.add_argument("--output", default=OPENING_BOOK_FILE)
+    parser.add_argument("--min-count", type=int, default=3)
+    parser.add_argument("--max-entries", type=int, default=500)
+    args = parser.parse_args()
+
+    games = load_games(args.games)
+    book = OpeningBook.build(games, args.min_count, args.max_entries)
+    book.save(args.output)
+    served, total = book.coverage(games)
+    print(f"Opening book with {book.entries()} questions written to {args.output}; "
+          f"it covers {served} of {total} logged rounds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import sys
+import time
+import asyncio
+import functools
+import logging
+import threading
+import traceback
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# WAMP procedure the health snapshot is registered under (see ReactorMonitor.register).
+HEALTH_PROCEDURE = "game.health"
+
+
+class ReactorMonitor:
+    """
+    Health monitor for the Twisted reactor.
+
+    - Lag: a LoopingCall fires every `interval` seconds; how late it fires is the reactor lag.
+    - Stalls: a watchdog thread checks the last tick. When the reactor has not ticked for
+      `lag_threshold` seconds, the stack of the reactor thread is logged once per stall,
+      which shows what is blocking it (an LLM call, STT decoding, gesture generation...).
+    - In-flight WAMP calls: calls of an instrumented session, counted until they return.
+    - Pending Deferreds: the game's own long-lived Deferreds (or asyncio futures), e.g.
+      wait_for_response and say_animated, counted until they fire (see track() and the
+      tracked() decorator).
+    - Active operations: named counters, e.g. the running loop_gesture loops (see active()
+      and the counted() decorator).
+    - Component stats: functions added with add_stats(), e.g. the audio buffer's stats().
+
+    snapshot() returns all of it as a dict; register() exposes it as a WAMP procedure.
+    The counters also work without start(), e.g. in the asyncio flavor.
+    """
+
+    def __init__(self, interval=0.05, lag_threshold=0.25, window=200):
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.lags = deque(maxlen=window)
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.last_stall = None
+        self.in_flight = {}
+        self.pending = {}
+        self.active_ops = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._last_tick = None
+        self._stall_reported = False
+        self._reactor_thread = None
+        self._loop = None
+        self._running = False
+
+    # Lag sampling
+
+    def start(self, reactor=None):
+        from twisted.internet.task import LoopingCall
+        if reactor is None:
+            from twisted.internet import reactor
+        self._reactor_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._loop = LoopingCall(self._tick)
+        self._loop.clock = reactor
+        self._loop.start(self.interval, now=False)
+        self._running = True
+        threading.Thread(target=self._watchdog, name="reactor-watchdog", daemon=True).start()
+        logger.debug("Reactor monitor started (interval %.3f s, threshold %.3f s).",
+                     self.interval, self.lag_threshold)
+
+    def stop(self):
+        self._running = False
+        if self._loop is not None and self._loop.running:
+            self._loop.stop()
+
+    def _tick(self):
+        now = time.monotonic()
+        lag = max(0.0, now - self._last_tick - self.interval)
+        self._last_tick = now
+        self.lags.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if self._stall_reported:
+            logger.warning("Reactor stall ended after %.3f s.", lag + self.interval)
+            self.last_stall["lag"] = lag + self.interval
+            self._stall_reported = False
+
+    def _watchdog(self):
+        while self._running:
+            time.sleep(self.interval)
+            blocked = time.monotonic() - self._last_tick
+            if blocked > self.lag_threshold and not self._stall_reported:
+                self._stall_reported = True
+                self.stalls += 1
+                frame = sys._current_frames().get(self._reactor_thread)
+                stack = traceback.format_stack(frame) if frame is not None else []
+                self.last_stall = {"time": time.time(), "lag": blocked, "stack": stack}
+                logger.warning("Reactor blocked for %.3f s; reactor thread stack:\n%s", blocked, "".join(stack))
+
+    # In-flight operations
+
+    def _count(self, counter, name, delta):
+        with self._lock:
+            counter[name] = counter.get(name, 0) + delta
+            if counter[name] <= 0:
+                del counter[name]
+
+    def track(self, deferred, name, call=False):
+        """
+        Counts a Deferred (or asyncio future) as pending until it fires, or as an in-flight
+        WAMP call with call=True. Returns it unchanged.
+        """
+        counter = self.in_flight if call else self.pending
+        self._count(counter, name, 1)
+
+        def done(result=None):
+            self._count(counter, name, -1)
+            return result
+
+        if hasattr(deferred, "addBoth"):
+            deferred.addBoth(done)
+        elif hasattr(deferred, "add_done_callback"):
+            deferred.add_done_callback(lambda _: done())
+        else:
+            done()
+        return deferred
+
+    def instrument_session(self, session):
+        """
+        Wraps session.call so every WAMP call is counted while it is in flight.
+        """
+        call = session.call
+
+        def tracked_call(procedure, *args, **kwargs):
+            return self.track(call(procedure, *args, **kwargs), procedure, call=True)
+
+        session.call = tracked_call
+
+    def active(self, name):
+        """
+        Context manager counting a running operation, e.g. `with monitor.active("loop_gesture"):`.
+        """
+        return _Active(self, name)
+
+    # Reporting
+
+    def add_stats(self, name, stats):
+        """
+        Adds stats() (a function returning a dict) to the snapshot under `name`.
+        """
+        self.stats[name] = stats
+
+    def snapshot(self):
+        lags = list(self.lags)
+        with self._lock:
+            in_flight = dict(self.in_flight)
+            pending = dict(self.pending)
+            active_ops = dict(self.active_ops)
+        return {
+            "lag": {
+                "current": lags[-1] if lags else 0.0,
+                "mean": sum(lags) / len(lags) if lags else 0.0,
+                "max": self.max_lag,
+                "blocked_for": time.monotonic() - self._last_tick if self._last_tick else 0.0
+            },
+            "stalls": self.stalls,
+            "last_stall": self.last_stall,
+            "in_flight_calls": sum(in_flight.values()),
+            "in_flight_by_procedure": in_flight,
+            "pending_deferreds": sum(pending.values()),
+            "pending_by_name": pending,
+            "active": active_ops,
+            **{name: stats() for name, stats in self.stats.items()}
+        }
+
+    def register(self, session, procedure=HEALTH_PROCEDURE):
+        """
+        Registers snapshot() as a WAMP procedure. Returns the registration Deferred.
+        """
+        return session.register(self.snapshot, procedure)
+
+
+class _Active:
+    def __init__(self, monitor, name):
+        self.monitor = monitor
+        self.name = name
+
+    def __enter__(self):
+        self.monitor._count(self.monitor.active_ops, self.name, 1)
+        return self
+
+    def __exit__(self, *exc):
+        self.monitor._count(self.monitor.active_ops, self.name, -1)
+        return False
+
+
+def _counting(counter, name):
+    """
+    Decorator counting the running calls of a function returning a Deferred (e.g. an
+    inlineCallbacks function) or of a coroutine function in the monitor's `counter`.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                monitor = get_monitor()
+                monitor._count(getattr(monitor, counter), name, 1)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    monitor._count(getattr(monitor, counter), name, -1)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            monitor = get_monitor()
+            monitor._count(getattr(monitor, counter), name, 1)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                monitor._count(getattr(monitor, counter), name, -1)
+                raise
+
+            def done(value):
+                monitor._count(getattr(monitor, counter), name, -1)
+                return value
+
+            if hasattr(result, "addBoth"):
+                result.addBoth(done)
+            else:
+                done(None)
+            return result
+        return wrapper
+    return decorator
+
+
+def counted(name):
+    """
+    Counts the running calls of a function as active operation `name` (see _counting).
+    """
+    return _counting("active_ops", name)
+
+
+def tracked(name):
+    """
+    Counts the Deferreds (or coroutines) returned by a function as pending until they fire.
+    """
+    return _counting("pending", name)
+
+
+_monitor = None
+
+
+def get_monitor():
+    """
+    Returns the shared monitor (created on first use, not started).
+    """
+    global _monitor
+    if _monitor is None:
+        _monitor = ReactorMonitor()
+    return _monitor
+
+
+def set_monitor(monitor):
+    global _monitor
+    _monitor = monitor
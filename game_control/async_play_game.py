@@ -0,0 +1,216 @@
+import asyncio
+import logging
+
+from api.async_api_handler import guess, answer_question_with_api, generate_secret_word
+from api.accounting import get_accountant
+from api.conversation import GuessConversation
+from api.opening_book import record_game
+from game_control.speculation import AsyncSpeculativeRequest, speculative_guess
+from game_control.game_logic import (
+    MAX_ROUNDS_ROBOT_GUESSES, MAX_ROUNDS_USER_GUESSES, NO_RESPONSE,
+    clear_words, clean_response, choose_mode, answer_gesture, clean_question, is_correct_guess
+)
+from gesture_control.async_say_animated import say_animated
+from diagnostics.health import tracked
+
+# asyncio counterpart of play_game.py, robot_guesses.py, user_guesses.py and game_utils.py.
+# The game rules are shared through game_logic; LLM calls are started as tasks so they
+# overlap with the robot's speech where the flow allows it.
+
+logger = logging.getLogger(__name__)
+
+
+@tracked("wait_for_response")
+async def wait_for_response(prompt_text, session, stt, timeout=15, barge_in=None, keep_words=False):
+    """
+    Waits for an STT response from the user, see game_utils.wait_for_response.
+    """
+    if prompt_text:
+        logger.debug("Prompting user: %s", prompt_text)
+        clear_words(stt)
+        interrupted = await say_animated(session, prompt_text, gesture_name="beat_gesture", barge_in=barge_in)
+        if not interrupted:
+            await asyncio.sleep(1.5)
+            clear_words(stt)
+    elif barge_in and barge_in.interrupted:
+        # The user already started answering while the robot was speaking.
+        logger.debug("Keeping words spoken during barge-in.")
+    elif keep_words:
+        logger.debug("Keeping words spoken since the robot finished speaking.")
+    else:
+        clear_words(stt)
+    if barge_in:
+        barge_in.interrupted = False
+
+    response = None
+    waited = 0.0
+    poll_interval = 1.0
+    while not response and waited < timeout:
+        await asyncio.sleep(poll_interval)
+        waited += poll_interval
+        words = stt.give_me_words()  # clears new_words flag.
+        if words:
+            response = clean_response(words)
+            logger.debug("Received STT response: %s", response)
+        else:
+            logger.debug("Waiting for STT response... (%.1f/%d sec)", waited, timeout)
+    if not response:
+        logger.debug("Timeout reached with no response.")
+    return response
+
+
+async def play_game_robot_guesses(session, stt, barge_in=None, partials=None):
+    """
+    Game mode where the user thinks of a word and the robot tries to guess it by asking yes/no questions.
+    The first question is generated while the robot says "Let's start!", the next ones as
+    soon as a partial transcript of the answer is in (with partials).
+    """
+    logger.debug("Starting play_game_robot_guesses()")
+    game_id = get_accountant().start_game("robot_guesses")
+    conversation = GuessConversation()
+    previous_guesses = []  # Each entry: {'guess': <question>, 'feedback': <user response>}
+
+    await say_animated(session, "Great! Please think of a word and keep it in your mind.", gesture_name="beat_gesture")
+    await asyncio.sleep(5)
+
+    # Wait for user readiness.
+    ready = None
+    while not ready or "yes" not in ready.lower():
+        ready = await wait_for_response("Are you ready? Please say Yes when you are.", session, stt, timeout=20,
+                                        barge_in=barge_in)
+        logger.debug("User readiness response: %s", ready)
+        if not ready or "yes" not in ready.lower():
+            await session.call("rie.dialogue.say", text="Okay, waiting until you're ready...")
+            await asyncio.sleep(3)
+
+    next_guess = asyncio.create_task(guess("", previous_guesses, game_id, conversation))
+    await session.call("rie.dialogue.say", text="Let's start!")
+    round_counter = 0
+
+    while round_counter < MAX_ROUNDS_ROBOT_GUESSES:
+        logger.debug("Round %d starting...", round_counter + 1)
+        clean_guess = clean_question(await next_guess)
+        logger.debug("Generated guess question: %s", clean_guess)
+
+        interrupted = await say_animated(session, clean_guess, gesture_name="beat_gesture", barge_in=barge_in)
+        if not interrupted:
+            # From here on the words are the answer, also those said during the pause.
+            clear_words(stt)
+            await asyncio.sleep(5)
+
+        speculation = AsyncSpeculativeRequest(
+            stt, partials, speculative_guess(guess, clean_guess, previous_guesses, game_id, conversation),
+            when=lambda text: not is_correct_guess(text))
+        feedback = await wait_for_response(None, session, stt, timeout=20, barge_in=barge_in, keep_words=True)
+        if not feedback:
+            feedback = NO_RESPONSE
+        logger.debug("Feedback received: %s", feedback)
+
+        previous_guesses.append({'guess': clean_guess, 'feedback': feedback})
+        round_counter += 1
+
+        if is_correct_guess(feedback):
+            speculation.cancel()
+            await say_animated(session, "Yay! I guessed it!", gesture_name="celebration")
+            logger.debug("User confirmed correct guess. Ending game.")
+            break
+        if round_counter >= MAX_ROUNDS_ROBOT_GUESSES:
+            speculation.cancel()
+            break
+        next_guess = asyncio.create_task(speculation.result(feedback))
+        conversation.sync(previous_guesses)
+
+    won = bool(previous_guesses) and is_correct_guess(previous_guesses[-1]['feedback'])
+    if not won:
+        await say_animated(session, "I give up! That was a challenging word.", gesture_name="defeat",
+                           layer_beat=True)
+    record_game(previous_guesses, won)
+
+    await say_animated(session, "Thanks for playing!", gesture_name="goodbye_wave")
+    get_accountant().log_game_summary(game_id)
+
+
+async def play_game_user_guesses(session, stt, barge_in=None, partials=None):
+    """
+    Game mode where the robot chooses a word and the user asks yes/no questions.
+    The secret word is generated while the robot introduces the game, and answers are
+    requested as soon as a partial transcript of the question is in (with partials).
+    """
+    game_id = get_accountant().start_game("user_guesses")
+    secret_word = asyncio.create_task(generate_secret_word(game_id))
+
+    await say_animated(session, "I have chosen a word. Ask me yes/no questions to narrow it down.", gesture_name="beat_gesture")
+    await asyncio.sleep(1.5)
+    chosen_word = await secret_word
+    logger.debug("Robot's chosen word: %s", chosen_word)
+
+    round_counter = 0
+    while round_counter < MAX_ROUNDS_USER_GUESSES:
+        speculation = AsyncSpeculativeRequest(stt, partials,
+                                              lambda question: answer_question_with_api(chosen_word, question, game_id),
+                                              when=lambda question: chosen_word.lower() not in question.lower())
+        user_input = await wait_for_response(None, session, stt, timeout=20, barge_in=barge_in)
+        if not user_input:
+            speculation.cancel()
+            await say_animated(session, "I didn't catch that. Please try again.", gesture_name="shake_no",
+                               barge_in=barge_in, layer_beat=True)
+            continue
+
+        logger.debug("User input: %s", user_input)
+        if chosen_word.lower() in user_input.lower():
+            speculation.cancel()
+            await say_animated(session, "Congratulations! You guessed it!", gesture_name="celebration")
+            break
+
+        answer = await speculation.result(user_input)
+        logger.debug("Answer from API: %s", answer)
+        await say_animated(session, answer, gesture_name=answer_gesture(answer), barge_in=barge_in)
+        round_counter += 1
+
+    if round_counter >= MAX_ROUNDS_USER_GUESSES:
+        await say_animated(session, f"Sorry, you've run out of rounds. The word was {chosen_word}.", gesture_name="shake_no",
+                           layer_beat=True)
+
+    await say_animated(session, "Thanks for playing!", gesture_name="beat_gesture")
+    get_accountant().log_game_summary(game_id)
+
+
+async def play_game(session, stt, barge_in=None, partials=None):
+    """
+    Main game entry point, see play_game.play_game.
+    """
+    while True:
+        logger.debug("Starting new game...")
+        await say_animated(session, "Hello there!", gesture_name="goodbye_wave")
+        user_response = await wait_for_response("Do you want to play a game? Please say Yes or No.", session, stt,
+                                                barge_in=barge_in)
+        logger.debug("User response to invitation: %s", user_response)
+        if not user_response or "no" in user_response.lower():
+            await session.call("rie.dialogue.say", text="Okay, maybe next time!")
+            await say_animated(session, "Goodbye!", gesture_name="goodbye_wave")
+            logger.debug("User declined to play.")
+            break
+
+        await say_animated(session,
+                           "Great! Would you like me to guess your word, or would you like to guess my word? "
+                           "Please say 'I guess' if you want to guess my word, or 'You guess' if you want me to guess yours.",
+                           gesture_name="beat_gesture")
+        await asyncio.sleep(2)
+        await say_animated(session, "When you are ready", gesture_name="thinking")
+        mode_response = await wait_for_response("Please choose the game mode.", session, stt, barge_in=barge_in)
+        logger.debug("Mode selection response: %s", mode_response)
+
+        if choose_mode(mode_response) == "robot_guesses":
+            await play_game_robot_guesses(session, stt, barge_in, partials)
+        else:
+            await play_game_user_guesses(session, stt, barge_in, partials)
+
+        again = await wait_for_response("Do you want to play another game? Please say Yes or No.", session, stt,
+                                        barge_in=barge_in)
+        await say_animated(session, "", gesture_name="thinking")
+        if not again or "yes" not in again.lower():
+            await session.call("rie.dialogue.say", text="Okay, thanks for playing!")
+            await say_animated(session, "", gesture_name="goodbye_wave")
+            logger.debug("User chose to end the session.")
+            await session.leave()  # Terminate the session.
+            break
@@ -0,0 +1,70 @@
+import re
+import string
+
+# Pure game rules shared by the robot game modes and the headless self-play runner.
+
+MAX_ROUNDS_ROBOT_GUESSES = 7
+MAX_ROUNDS_USER_GUESSES = 15
+
+# Feedback recorded for a round in which the user did not answer in time.
+NO_RESPONSE = "No response"
+
+WIN_KEYWORDS = ["that is correct", "yes thats it", "exactly", "yes you guessed it"]
+
+
+def clear_words(stt):
+    """
+    Clears the recognized words of the SpeechToText instance.
+    give_me_words() returns stt.english_words, so that is the list to reset.
+    """
+    stt.english_words = []
+    stt.new_words = False
+
+
+def clean_response(words):
+    """
+    Joins the recognized words into one response string.
+    """
+    raw_response = " ".join(words)
+    # Remove all "<" and ">" characters which are used in the prompts
+    cleaned = raw_response.replace("<", "").replace(">", "").strip()
+    # If the cleaned response is very long, take only the first word.
+    if len(cleaned) > 50:
+        cleaned = cleaned.split()[0]
+    return cleaned
+
+
+def choose_mode(mode_response):
+    """
+    Maps the mode selection response to "user_guesses" or "robot_guesses" (the default).
+    """
+    if mode_response and "i guess" in mode_response.lower():
+        return "user_guesses"
+    return "robot_guesses"
+
+
+def answer_gesture(answer):
+    """
+    Gesture that goes with a yes/no answer: nod, shake, or a beat gesture if unclear.
+    """
+    if "yes" in answer.lower():
+        return "nod_yes"
+    elif "no" in answer.lower():
+        return "shake_no"
+    return "beat_gesture"
+
+
+def clean_question(question):
+    """
+    Removes all '<' and '>' characters from a generated question.
+    """
+    return re.sub(r'[<>]', '', question).strip()
+
+
+def is_correct_guess(feedback):
+    """
+    Returns True if the user's feedback confirms that the robot guessed the word.
+    Punctuation is removed first for a robust match.
+    """
+    feedback_cleaned = feedback.lower().translate(str.maketrans("", "", string.punctuation))
+    return any(affirm in feedback_cleaned for affirm in WIN_KEYWORDS)
@@ -1,34 +1,52 @@
 import logging
 from twisted.internet.defer import inlineCallbacks
 from autobahn.twisted.util import sleep
-from assignment_2.gesture_control.say_animated import say_animated
+from gesture_control.say_animated import say_animated
+from game_control.game_logic import clear_words, clean_response
+from diagnostics.health import tracked
 
 logger = logging.getLogger(__name__)
 
 
+@tracked("wait_for_response")
 @inlineCallbacks
-def wait_for_response(prompt_text, session, stt, timeout=15):
+def wait_for_response(prompt_text, session, stt, timeout=15, barge_in=None, keep_words=False):
     """
     Waits for an STT response from the user.
     If prompt_text is provided, the robot will speak it; if None, no dialogue is spoken.
     It resets the STT words list and then polls for a response.
 
+    With barge_in (a VoiceActivityDetector), the user may interrupt the prompt. The words
+    spoken from that moment on are kept as the response instead of being cleared.
+    Without a prompt, keep_words keeps the words heard so far (the caller cleared them
+    when its own speech ended).
+
     :param prompt_text: Optional text to speak before waiting for a response.
     :param session: The WAMP session (for dialogue actions).
     :param stt: The shared SpeechToText instance.
     :param timeout: Maximum seconds to wait.
+    :param barge_in: Optional VoiceActivityDetector enabling barge-in.
+    :param keep_words: Without prompt_text, do not clear the words heard so far.
     :return: The recognized user response as a string (or None on timeout).
     """
     if prompt_text:
         logger.debug("Prompting user: %s", prompt_text)
-        stt.words = []  # clear previous words
+        clear_words(stt)  # clear previous words
         # yield session.call("rie.dialogue.say", text=prompt_text)
-        yield say_animated(session, prompt_text, gesture_name="beat_gesture")
-        yield sleep(1.5)
-        stt.words = []
+        interrupted = yield say_animated(session, prompt_text, gesture_name="beat_gesture", barge_in=barge_in)
+        if not interrupted:
+            yield sleep(1.5)
+            clear_words(stt)
+    elif barge_in and barge_in.interrupted:
+        # The user already started answering while the robot was speaking.
+        logger.debug("Keeping words spoken during barge-in.")
+    elif keep_words:
+        logger.debug("Keeping words spoken since the robot finished speaking.")
     else:
         # If no prompt_text, simply clear any previous words.
-        stt.words = []
+        clear_words(stt)
+    if barge_in:
+        barge_in.interrupted = False
 
     response = None
     waited = 0.0
@@ -38,13 +56,7 @@ def wait_for_response(prompt_text, session, stt, timeout=15):
         waited += poll_interval
         words = stt.give_me_words()  # clears new_words flag.
         if words:
-            raw_response = " ".join(words)
-            # Remove all "<" and ">" characters which are used in the prompts
-            cleaned = raw_response.replace("<", "").replace(">", "").strip()
-            # If the cleaned response is very long, take only the first word.
-            if len(cleaned) > 50:
-                cleaned = cleaned.split()[0]
-            response = cleaned
+            response = clean_response(words)
             logger.debug("Received STT response: %s", response)
         else:
             logger.debug("Waiting for STT response... (%.1f/%d sec)", waited, timeout)
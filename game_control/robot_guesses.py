@@ -1,21 +1,28 @@
 import logging
-import re
-import string
 from twisted.internet.defer import inlineCallbacks
 from autobahn.twisted.util import sleep
 from api.api_handler import guess
+from api.accounting import get_accountant
+from api.conversation import GuessConversation
+from api.opening_book import record_game
 from game_control.game_utils import wait_for_response
+from game_control.speculation import SpeculativeRequest, speculative_guess
+from game_control.game_logic import MAX_ROUNDS_ROBOT_GUESSES, NO_RESPONSE, clear_words, clean_question, is_correct_guess
 from gesture_control.say_animated import say_animated
 
 logger = logging.getLogger(__name__)
 
 
 @inlineCallbacks
-def play_game_robot_guesses(session, stt):
+def play_game_robot_guesses(session, stt, barge_in=None, partials=None):
     """
     Game mode where the user thinks of a word and the robot tries to guess it by asking yes/no questions.
+    With barge_in, the user may answer while the robot is still asking.
+    With partials, the next question is requested as soon as a partial transcript of the answer is in.
     """
     logger.debug("Starting play_game_robot_guesses()")
+    game_id = get_accountant().start_game("robot_guesses")
+    conversation = GuessConversation()
     previous_guesses = []  # Each entry: {'guess': <question>, 'feedback': <user response>}
 
     yield say_animated(session, "Great! Please think of a word and keep it in your mind.", gesture_name="beat_gesture")
@@ -25,7 +32,8 @@ def play_game_robot_guesses(session, stt):
     # Wait for user readiness.
     ready = None
     while not ready or "yes" not in ready.lower():
-        ready = yield wait_for_response("Are you ready? Please say Yes when you are.", session, stt, timeout=20)
+        ready = yield wait_for_response("Are you ready? Please say Yes when you are.", session, stt, timeout=20,
+                                         barge_in=barge_in)
         logger.debug("User readiness response: %s", ready)
         if not ready or "yes" not in ready.lower():
             yield session.call("rie.dialogue.say", text="Okay, waiting until you're ready...")
@@ -35,25 +43,32 @@ def play_game_robot_guesses(session, stt):
     yield session.call("rie.dialogue.say", text="Let's start!")
     logger.debug("User confirmed readiness. Starting guessing rounds.")
     last_feedback = ""
-    max_rounds = 7
+    max_rounds = MAX_ROUNDS_ROBOT_GUESSES
     round_counter = 0
+    # Generate the first question using ChatGPT.
+    guess_question = guess(last_feedback, previous_guesses, game_id, conversation)
 
     while round_counter < max_rounds:
         logger.debug("Round %d starting...", round_counter + 1)
-        # Generate the next question using ChatGPT.
-        guess_question = guess(last_feedback, previous_guesses)
         # Remove all '<' and '>' characters from the prompts
-        clean_guess = re.sub(r'[<>]', '', guess_question).strip()
+        clean_guess = clean_question(guess_question)
         logger.debug("Generated guess question: %s", clean_guess)
 
         # Robot speaks the question.
-        yield say_animated(session, clean_guess, gesture_name="beat_gesture")
-        yield sleep(5)
+        interrupted = yield say_animated(session, clean_guess, gesture_name="beat_gesture", barge_in=barge_in)
+        if not interrupted:
+            # From here on the words are the answer, also those said during the pause.
+            clear_words(stt)
+            yield sleep(5)
 
-        # Wait for the user's answer.
-        feedback = yield wait_for_response(None, session, stt, timeout=20)
+        # Wait for the user's answer. The next question is requested as soon as a partial
+        # transcript of the answer is in.
+        speculation = SpeculativeRequest(stt, partials,
+                                         speculative_guess(guess, clean_guess, previous_guesses, game_id, conversation),
+                                         when=lambda text: not is_correct_guess(text))
+        feedback = yield wait_for_response(None, session, stt, timeout=20, barge_in=barge_in, keep_words=True)
         if not feedback:
-            feedback = "No response"
+            feedback = NO_RESPONSE
             logger.debug("No feedback received; defaulting to: %s", feedback)
         else:
             logger.debug("Feedback received: %s", feedback)
@@ -61,20 +76,28 @@ def play_game_robot_guesses(session, stt):
         previous_guesses.append({'guess': clean_guess, 'feedback': feedback})
         round_counter += 1
 
-        # Clean feedback (remove punctuation) for a robust match.
-        feedback_cleaned = feedback.lower().translate(str.maketrans("", "", string.punctuation))
-        win_keywords = ["that is correct", "yes thats it", "exactly", "yes you guessed it"]
-        if any(affirm in feedback_cleaned for affirm in win_keywords):
+        if is_correct_guess(feedback):
+            speculation.cancel()
             yield say_animated(session, "Yay! I guessed it!", gesture_name="celebration")
             logger.debug("User confirmed correct guess. Ending game.")
             break
         else:
             last_feedback = feedback
             logger.debug("Continuing game with last feedback: %s", last_feedback)
+            if round_counter < max_rounds:
+                # Generate the next question using ChatGPT.
+                guess_question = yield speculation.result(last_feedback)
+                conversation.sync(previous_guesses)
+            else:
+                speculation.cancel()
 
-    if round_counter >= max_rounds:
-        yield say_animated(session, "I give up! That was a challenging word.", gesture_name="defeat")
+    won = bool(previous_guesses) and is_correct_guess(previous_guesses[-1]['feedback'])
+    if not won:
+        yield say_animated(session, "I give up! That was a challenging word.", gesture_name="defeat",
+                           layer_beat=True)
         logger.debug("Reached maximum rounds; game over.")
+    record_game(previous_guesses, won)
 
     yield say_animated(session, "Thanks for playing!", gesture_name="goodbye_wave")
     logger.debug("Game ended. Thank you for playing!")
+    get_accountant().log_game_summary(game_id)
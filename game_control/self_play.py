@@ -0,0 +1,144 @@
+"""
+Headless self-play evaluation of the robot_guesses question strategy.
+
+The guessing side runs the same logic as play_game_robot_guesses (guess() with a
+per-game GuessConversation, the same round limit and win check), without the robot.
+The answering side is simulated: it confirms the word when a question names it and
+otherwise answers with answer_question_with_api. Games run concurrently in a thread
+pool, which keeps the blocking LLM calls overlapped.
+
+The LLM calls of the guesser (guess) and of the simulated player (answer) are reported
+separately. With the stub backend, the run is only a smoke test of the harness: its
+questions never name a word, so it does not measure a strategy.
+
+Usage:
+    python -m game_control.self_play --games 500 --concurrency 32 --backend stub
+"""
+import argparse
+import itertools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api.api_handler import guess, answer_question_with_api
+from api.accounting import get_accountant
+from api.backends import create_backend, get_backend, set_backend
+from api.conversation import GuessConversation
+from api.opening_book import record_game
+from game_control.game_logic import MAX_ROUNDS_ROBOT_GUESSES, clean_question, is_correct_guess
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORDS = [
+    "apple", "tiger", "house", "pencil", "banana", "rabbit", "bottle", "garden",
+    "chair", "guitar", "rocket", "pillow", "turtle", "bread", "window", "flower"
+]
+
+
+def simulate_answer(secret_word, question, game_id=None):
+    """
+    Feedback of the simulated player to one question.
+    """
+    if secret_word.lower() in question.lower():
+        return "Yes you guessed it"
+    return answer_question_with_api(secret_word, question, game_id)
+
+
+def play_self_game(secret_word, max_rounds=MAX_ROUNDS_ROBOT_GUESSES, log_games=False):
+    """
+    Plays one robot_guesses game against the simulated player.
+    With log_games, the game is appended to the game log the opening book is built from.
+
+    :return: dict with word, won, rounds, guess_calls, answer_calls and wall_time (s).
+    """
+    accountant = get_accountant()
+    game_id = accountant.start_game("self_play")
+    conversation = GuessConversation()
+    previous_guesses = []
+    last_feedback = ""
+    won = False
+    start = time.perf_counter()
+
+    while len(previous_guesses) < max_rounds:
+        question = clean_question(guess(last_feedback, previous_guesses, game_id, conversation))
+        feedback = simulate_answer(secret_word, question, game_id)
+        previous_guesses.append({'guess': question, 'feedback': feedback})
+        if is_correct_guess(feedback):
+            won = True
+            break
+        last_feedback = feedback
+
+    if log_games:
+        record_game(previous_guesses, won)
+    totals = accountant.game_totals(game_id)
+    return {
+        "word": secret_word,
+        "won": won,
+        "rounds": len(previous_guesses),
+        "guess_calls": totals["by_call_type"].get("guess", 0),
+        "answer_calls": totals["by_call_type"].get("answer", 0),
+        "wall_time": time.perf_counter() - start
+    }
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+def summarize(results, total_time):
+    wins = [r for r in results if r["won"]]
+    wall_times = sorted(r["wall_time"] for r in results)
+    return {
+        "games": len(results),
+        "win_rate": len(wins) / len(results) if results else 0.0,
+        "mean_rounds_to_win": _mean([r["rounds"] for r in wins]),
+        "mean_guess_calls_per_game": _mean([r["guess_calls"] for r in results]),
+        "mean_answer_calls_per_game": _mean([r["answer_calls"] for r in results]),
+        "mean_wall_time_per_game": _mean(wall_times),
+        "p95_wall_time_per_game": wall_times[int(0.95 * (len(wall_times) - 1))] if wall_times else 0.0,
+        "total_wall_time": total_time
+    }
+
+
+def run_self_play(words=DEFAULT_WORDS, games=500, concurrency=32, max_rounds=MAX_ROUNDS_ROBOT_GUESSES,
+                  log_games=False):
+    """
+    Plays `games` games over the word list (cycled) with at most `concurrency` running at once.
+
+    :return: (summary dict, list of per-game results)
+    """
+    secret_words = list(itertools.islice(itertools.cycle(words), games))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda word: play_self_game(word, max_rounds, log_games), secret_words))
+    return summarize(results, time.perf_counter() - start), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play evaluation of the question strategy.")
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--backend", default=None, help="openai, local or stub (default: LLM_BACKEND)")
+    parser.add_argument("--words", default=None, help="file with one secret word per line")
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS_ROBOT_GUESSES)
+    parser.add_argument("--log-games", action="store_true", help="append games to the opening book's game log")
+    args = parser.parse_args()
+
+    words = DEFAULT_WORDS
+    if args.words:
+        with open(args.words, "r") as f:
+            words = [line.strip() for line in f if line.strip()]
+    backend = create_backend(args.backend) if args.backend else get_backend()
+    set_backend(backend)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s SELF PLAY %(levelname)-8s %(message)s',
+                        datefmt='%H:%M:%S')
+    if backend.name == "stub":
+        logging.info("Stub backend: harness smoke test only, the results do not measure the question strategy.")
+    summary, _ = run_self_play(words, args.games, args.concurrency, args.max_rounds, args.log_games)
+    for key, value in summary.items():
+        print(f"{key:>28}: {value:.3f}" if isinstance(value, float) else f"{key:>28}: {value}")
+
+
+if __name__ == "__main__":
+    main()
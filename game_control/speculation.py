@@ -0,0 +1,181 @@
+import copy
+import time
+import asyncio
+import logging
+from twisted.internet.defer import CancelledError, succeed
+from twisted.internet.threads import deferToThread
+
+from api.opening_book import normalize_question
+from game_control.game_logic import clean_response
+
+logger = logging.getLogger(__name__)
+
+# Totals over the session, updated by the speculative requests.
+# time_saved is how long (s) the hits had already been running when the final transcript arrived.
+SPECULATION_TOTALS = {"requests": 0, "hits": 0, "misses": 0, "wasted": 0, "time_saved": 0.0}
+
+
+def speculative_guess(guess, question, previous_guesses, game_id, conversation):
+    """
+    Request for SpeculativeRequest: guess (api_handler.guess or its async version) with the
+    round being answered added, on copies of the history and the conversation, so dropped
+    requests leave the game untouched.
+    """
+    history = list(previous_guesses)
+    conversation = copy.deepcopy(conversation)
+
+    def request(feedback):
+        return guess(feedback, history + [{'guess': question, 'feedback': feedback}], game_id,
+                     copy.deepcopy(conversation))
+    return request
+
+
+class SpeculativeRequest:
+    """
+    Starts an LLM request on a partial transcript, before wait_for_response returns.
+
+    It listens to the partial transcripts of an AudioRingBuffer (partials) and calls
+    request(text) in a thread as soon as one arrives. When a later partial differs, the
+    earlier request is dropped and the new text is sent. result(final_text) returns the
+    speculative result if the final transcript matches the text it was started with
+    (ignoring case and punctuation), or else sends a new request.
+
+    `when(text)` can rule out texts that need no request (e.g. the user saying the word).
+    Without partials this is just request(final_text) in a thread.
+
+    Partial transcripts arrive from the audio worker thread and are handed to the reactor.
+    Once closed (by result() or cancel()), late partials no longer start requests.
+    """
+
+    def __init__(self, stt, partials, request, when=None):
+        self.stt = stt
+        self.partials = partials
+        self.request = request
+        self.when = when
+        self.text = None
+        self.pending = None
+        self.dispatched_at = None
+        self.finished_at = None
+        self.closed = False
+        if partials is not None:
+            partials.add_partial_listener(self.on_partial)
+
+    def on_partial(self, words):
+        # Imported here: the asyncio flavor uses this module without a Twisted reactor.
+        from twisted.internet import reactor
+        if not self.closed:
+            reactor.callFromThread(self._on_partial, words)
+
+    def _on_partial(self, words):
+        # A partial queued before close() must not start an orphan request.
+        if self.closed:
+            return
+        # The final response will be the words recognized so far plus this utterance.
+        text = clean_response(self.stt.english_words + words)
+        if not text or (self.when and not self.when(text)):
+            return
+        if self.text and normalize_question(text) == normalize_question(self.text):
+            return
+        self._drop()
+        logger.debug("Speculative request for partial transcript: %s", text)
+        self.text = text
+        self.dispatched_at = time.monotonic()
+        self.finished_at = None
+        self.pending = self._dispatch(text)
+        SPECULATION_TOTALS["requests"] += 1
+
+    def _finished(self, result, pending):
+        if pending is self.pending:
+            self.finished_at = time.monotonic()
+        return result
+
+    def _dispatch(self, text):
+        pending = deferToThread(self.request, text)
+        pending.addBoth(self._finished, pending)
+        pending.addErrback(lambda failure: failure.trap(CancelledError))
+        return pending
+
+    def _cancel(self, pending):
+        # The thread runs to completion; only its result is dropped.
+        pending.cancel()
+
+    def _drop(self):
+        if self.pending is not None:
+            self._cancel(self.pending)
+            SPECULATION_TOTALS["wasted"] += 1
+            self.pending = None
+            self.text = None
+
+    def close(self):
+        self.closed = True
+        if self.partials is not None:
+            self.partials.remove_partial_listener(self.on_partial)
+
+    def cancel(self):
+        """
+        Drops the speculative request, when the response needs no request after all.
+        """
+        self.close()
+        self._drop()
+
+    def _take(self, final_text):
+        """
+        Returns the matching speculative request, or None after dropping a mismatched one.
+        """
+        self.close()
+        if self.pending is None:
+            return None
+        if final_text and normalize_question(final_text) == normalize_question(self.text):
+            saved = (self.finished_at or time.monotonic()) - self.dispatched_at
+            SPECULATION_TOTALS["hits"] += 1
+            SPECULATION_TOTALS["time_saved"] += saved
+            logger.debug("Speculative request hit; %.2f s saved.", saved)
+            pending, self.pending = self.pending, None
+            return pending
+        logger.debug("Speculative request missed: %r != %r", self.text, final_text)
+        SPECULATION_TOTALS["misses"] += 1
+        self._drop()
+        return None
+
+    def result(self, final_text):
+        """
+        Deferred with request(final_text), started early if a partial transcript matched.
+        """
+        pending = self._take(final_text)
+        if pending is not None:
+            return pending
+        if not final_text:
+            return succeed(None)
+        return deferToThread(self.request, final_text)
+
+
+class AsyncSpeculativeRequest(SpeculativeRequest):
+    """
+    asyncio version: request is a coroutine function, run as a task that is cancelled when
+    dropped. Partial transcripts may come from a worker thread (stt.loop runs in one), so
+    they are handed to the event loop.
+    """
+
+    def __init__(self, stt, partials, request, when=None):
+        self.loop = asyncio.get_running_loop()
+        super().__init__(stt, partials, request, when)
+
+    def on_partial(self, words):
+        if not self.closed:
+            self.loop.call_soon_threadsafe(self._on_partial, words)
+
+    def _dispatch(self, text):
+        pending = asyncio.ensure_future(self.request(text))
+        pending.add_done_callback(lambda task: self._finished(None, task))
+        return pending
+
+    def _cancel(self, pending):
+        pending.cancel()
+
+    async def result(self, final_text):
+        pending = self._take(final_text)
+        if pending is not None:
+            return await pending
+        if not final_text:
+            return None
+        return await self.request(final_text)
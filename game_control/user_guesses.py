@@ -3,28 +3,38 @@ from twisted.internet.defer import inlineCallbacks
 from autobahn.twisted.util import sleep
 
 from game_control.game_utils import wait_for_response
+from game_control.game_logic import MAX_ROUNDS_USER_GUESSES, answer_gesture
 from api.api_handler import answer_question_with_api, generate_secret_word
+from api.accounting import get_accountant
+from game_control.speculation import SpeculativeRequest
 from gesture_control.say_animated import say_animated
 
 
 @inlineCallbacks
-def play_game_user_guesses(session, stt):
+def play_game_user_guesses(session, stt, barge_in=None, partials=None):
     logger = logging.getLogger(__name__)
-    chosen_word = generate_secret_word()
+    game_id = get_accountant().start_game("user_guesses")
+    chosen_word = generate_secret_word(game_id)
     logger.debug("Robot's chosen word: %s", chosen_word)
 
     # Use a "beat_gesture" for normal/neutral speech:
     yield say_animated(session, "I have chosen a word. Ask me yes/no questions to narrow it down.", gesture_name="beat_gesture")
     yield sleep(1.5)
 
-    max_rounds = 15
+    max_rounds = MAX_ROUNDS_USER_GUESSES
     round_counter = 0
 
     while round_counter < max_rounds:
-        user_input = yield wait_for_response(None, session, stt, timeout=20)
+        # The answer is requested as soon as a partial transcript of the question is in.
+        speculation = SpeculativeRequest(stt, partials,
+                                         lambda question: answer_question_with_api(chosen_word, question, game_id),
+                                         when=lambda question: chosen_word.lower() not in question.lower())
+        user_input = yield wait_for_response(None, session, stt, timeout=20, barge_in=barge_in)
         if not user_input:
+            speculation.cancel()
             # Use a "shake_no" gesture to show we didn't catch that
-            yield say_animated(session, "I didn't catch that. Please try again.", gesture_name="shake_no")
+            yield say_animated(session, "I didn't catch that. Please try again.", gesture_name="shake_no",
+                               barge_in=barge_in, layer_beat=True)
             continue
 
         logger.debug("User input: %s", user_input)
@@ -32,28 +42,24 @@ def play_game_user_guesses(session, stt):
         # Check if user guessed the secret word:
         if chosen_word.lower() in user_input.lower():
             # Celebrate if the user is correct
+            speculation.cancel()
             yield say_animated(session, "Congratulations! You guessed it!", gesture_name="celebration")
             break
         else:
             # Let the API produce a yes/no style answer:
-            answer = answer_question_with_api(chosen_word, user_input)
+            answer = yield speculation.result(user_input)
             logger.debug("Answer from API: %s", answer)
 
             # Decide on nod/shake for yes or no
-            if "yes" in answer.lower():
-                gesture = "nod_yes"
-            elif "no" in answer.lower():
-                gesture = "shake_no"
-            else:
-                # If the answer is more neutral or unclear, maybe just do a beat gesture
-                gesture = "beat_gesture"
-
-            yield say_animated(session, answer, gesture_name=gesture)
+            gesture = answer_gesture(answer)
+            yield say_animated(session, answer, gesture_name=gesture, barge_in=barge_in)
             round_counter += 1
 
     if round_counter >= max_rounds:
         # If user never guessed, do a "sad" or "shake_no" gesture:
-        yield say_animated(session, f"Sorry, you've run out of rounds. The word was {chosen_word}.", gesture_name="shake_no")
+        yield say_animated(session, f"Sorry, you've run out of rounds. The word was {chosen_word}.", gesture_name="shake_no",
+                           layer_beat=True)
 
     # End of game message (neutral beat)
     yield say_animated(session, "Thanks for playing!", gesture_name="beat_gesture")
+    get_accountant().log_game_summary(game_id)
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+
+from gesture_control.gesture_frames import (
+    GESTURE_LIBRARY, beat_frames, library_frames, layered_frames, estimate_speech_duration
+)
+from gesture_control.trajectory import retime_from_position
+from gesture_control.frame_encoding import encode_frames
+from diagnostics.health import counted, tracked
+
+# asyncio counterpart of say_animated.py, for autobahn.asyncio sessions.
+
+logger = logging.getLogger(__name__)
+
+
+async def perform_movement(session, frames, mode="linear", sync=False, force=True):
+    """
+    asyncio version of alpha_mini_rug.perform_movement (which is Twisted only).
+    The frames are retimed from the current joint positions, so the first frame
+    is not reached faster than the joints allow, and delta encoded; then the motor
+    write is sent without waiting for the movement to finish.
+    Returns the duration (s) of the movement as sent.
+    """
+    current_position = await session.call("rom.sensor.proprio.read")
+    frames = retime_from_position(frames, current_position[0]["data"])
+    frames, _ = encode_frames(frames)
+    session.call("rom.actuator.motor.write", frames=frames, mode=mode, sync=sync, force=force)
+    return frames[-1]["time"] / 1000.0
+
+
+@counted("loop_gesture")
+async def loop_gesture(session, dialogue, start_time, estimated_duration, barge_in=None):
+    """
+    Repeatedly perform a beat gesture until
+    (1) the TTS is finished, or
+    (2) the estimated TTS duration is exceeded, or
+    (3) the user barged in (barge_in.interrupted).
+    """
+    while not dialogue.done() and not (barge_in and barge_in.interrupted):
+        frames = beat_frames()
+
+        # If TTS has gone on as long as we estimate, break out
+        if time.time() - start_time >= estimated_duration:
+            break
+
+        movement_duration = await perform_movement(session, frames, mode="linear", sync=False, force=True)
+        await asyncio.sleep(movement_duration)
+
+
+async def perform_single_gesture(session, frames):
+    await asyncio.sleep(await perform_movement(session, frames, mode="last", sync=False, force=True))
+
+
+async def perform_layered_gesture(session, frames, dialogue, start_time, estimated_duration, barge_in=None):
+    """
+    A gesture with layered beat motion, after which the beat goes on until the TTS is done.
+    """
+    await perform_single_gesture(session, frames)
+    await loop_gesture(session, dialogue, start_time, estimated_duration, barge_in)
+
+
+async def watch_barge_in(session, dialogue, barge_in, poll_interval=0.1):
+    """
+    Polls the voice activity detector while the robot speaks and stops the
+    dialogue when the user starts talking.
+    """
+    while not dialogue.done():
+        if barge_in.voice_detected:
+            logger.debug("User barged in; stopping dialogue.")
+            barge_in.interrupted = True
+            await session.call("rie.dialogue.stop")
+            break
+        await asyncio.sleep(poll_interval)
+
+
+async def _guarded(coro, name):
+    """
+    Runs a gesture or watcher coroutine inside say_animated's task group. Errors are logged
+    and swallowed, so a failing motor write cannot cancel the speech.
+    """
+    try:
+        await coro
+    except Exception:
+        logger.exception("%s failed during say_animated.", name)
+
+
+@tracked("say_animated")
+async def say_animated(session, text, gesture_name=None, barge_in=None, layer_beat=False):
+    """
+    Animated speech, see say_animated.say_animated (including layer_beat). The gesture and
+    the barge-in watcher run as tasks of one task group next to the dialogue call; their
+    errors are only logged. An error of the dialogue call itself is raised as is.
+    Returns True if the robot was interrupted.
+    """
+    start_time = time.time()
+    dialogue = asyncio.ensure_future(session.call("rie.dialogue.say", text=text))
+    estimated_duration = estimate_speech_duration(text)
+
+    async with asyncio.TaskGroup() as tasks:
+        if barge_in:
+            barge_in.start()
+            tasks.create_task(_guarded(watch_barge_in(session, dialogue, barge_in), "watch_barge_in"))
+
+        if gesture_name == "beat_gesture":
+            tasks.create_task(_guarded(loop_gesture(session, dialogue, start_time, estimated_duration, barge_in),
+                                       "loop_gesture"))
+        elif gesture_name in GESTURE_LIBRARY:
+            if layer_beat:
+                frames = layered_frames(gesture_name, max_duration=estimated_duration * 1000.0)
+                if frames:
+                    tasks.create_task(_guarded(perform_layered_gesture(session, frames, dialogue, start_time,
+                                                                       estimated_duration, barge_in),
+                                               gesture_name))
+            else:
+                frames = library_frames(gesture_name)
+                if frames:
+                    tasks.create_task(_guarded(perform_single_gesture(session, frames), gesture_name))
+        else:
+            logger.debug("Gesture '%s' not found or None specified; skipping gesture.", gesture_name)
+
+        # Wait for TTS to finish. An error is raised after the group, so it is not
+        # wrapped in an ExceptionGroup.
+        dialogue_error = None
+        try:
+            await dialogue
+        except Exception as e:
+            # A stopped dialogue may end in an error; that is expected after a barge-in.
+            if not (barge_in and barge_in.interrupted):
+                dialogue_error = e
+            else:
+                logger.debug("Dialogue ended after barge-in: %s", e)
+
+    if dialogue_error is not None:
+        if barge_in:
+            barge_in.stop()
+        raise dialogue_error
+
+    interrupted = False
+    if barge_in:
+        barge_in.stop()
+        interrupted = barge_in.interrupted
+    logger.debug("Dialogue finished; say_animated complete.")
+    return interrupted
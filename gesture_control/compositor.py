@@ -0,0 +1,79 @@
+import logging
+import numpy as np
+
+from gesture_control.trajectory import _to_matrix, _forward_fill
+
+logger = logging.getLogger(__name__)
+
+
+def track_joints(frames):
+    joints = []
+    for frame in frames:
+        for joint in frame.get("data", {}):
+            if joint not in joints:
+                joints.append(joint)
+    return joints
+
+
+def offset_frames(frames, offset):
+    return [{"time": round(float(frame["time"]) + offset, 3), "data": dict(frame["data"])} for frame in frames]
+
+
+def repeat_track(make_frames, duration):
+    """
+    Concatenates cycles of make_frames() (each starting at time 0) until `duration` ms are
+    covered. A cycle's first frame is dropped after the first cycle, since the previous
+    cycle already ends there (the beat starts and ends in the neutral pose).
+    """
+    frames = make_frames()
+    while frames and frames[-1]["time"] < duration:
+        cycle = make_frames()
+        frames += offset_frames(cycle[1:], frames[-1]["time"] - cycle[0]["time"])
+    return frames
+
+
+def compose_tracks(tracks, duration=None):
+    """
+    Merges several trajectories (tracks) that run at the same time into one.
+
+    Every joint is taken from the first track that moves it, so a library gesture placed
+    first keeps its joints and a beat track placed after it fills in the other joints.
+    The merged frames are at the union of the track times (up to `duration` ms, by default
+    the end of the first track); each joint is linearly interpolated between the frames of
+    its own track and held before its first and after its last frame. Every frame has
+    every joint, since the robot would hold a joint a frame leaves out (see
+    trajectory._forward_fill) instead of following its track; encode_frames drops the
+    entries that are actually held before the frames are sent.
+    """
+    tracks = [track for track in tracks if track]
+    if not tracks:
+        return []
+    if duration is None:
+        duration = float(tracks[0][-1]["time"])
+
+    owners = {}
+    for track in tracks:
+        for joint in track_joints(track):
+            owners.setdefault(joint, track)
+
+    times = np.unique(np.round(np.concatenate(
+        [[float(frame["time"]) for frame in track] for track in tracks]), 3))
+    times = times[times <= duration]
+    if times.size == 0 or times[-1] < duration:
+        times = np.append(times, duration)
+
+    columns = {}
+    for track in tracks:
+        joints = [joint for joint in track_joints(track) if owners[joint] is track]
+        if not joints:
+            continue
+        track_times, angles = _to_matrix(track, joints)
+        angles = _forward_fill(angles)
+        for col, joint in enumerate(joints):
+            known = ~np.isnan(angles[:, col])
+            columns[joint] = np.interp(times, track_times[known], angles[known, col])
+
+    logger.debug("Composed %d tracks into %d frames (%d joints).", len(tracks), len(times), len(columns))
+    return [{"time": round(float(t), 3), "data": {joint: round(float(values[row]), 3)
+                                                  for joint, values in columns.items()}}
+            for row, t in enumerate(times)]
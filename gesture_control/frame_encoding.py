@@ -0,0 +1,143 @@
+import json
+import logging
+import numpy as np
+
+from gesture_control.trajectory import JOINT_LIMITS, retime_frames, _to_matrix, _forward_fill
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Resolution the frames are quantized to before they are sent.
+ANGLE_RESOLUTION = 0.005  # rad
+TIME_RESOLUTION = 1       # ms; integer times are packed as msgpack ints instead of floats
+
+# Totals over the session, updated by encode_frames().
+ENCODING_TOTALS = {"frames": 0, "bytes_in": 0, "bytes_out": 0, "bytes_saved": 0}
+
+
+def payload_size(frames):
+    """
+    Size in bytes of the frames as sent over the WAMP connection (msgpack; json if msgpack
+    is not installed).
+    """
+    if msgpack is not None:
+        return len(msgpack.packb(frames))
+    return len(json.dumps(frames, separators=(",", ":")).encode())
+
+
+def _joint_points(frames):
+    """
+    Returns {joint: (frame indices, times, angles)} for every joint in the frames.
+    """
+    points = {}
+    for idx, frame in enumerate(frames):
+        for joint, angle in frame["data"].items():
+            points.setdefault(joint, ([], [], []))
+            points[joint][0].append(idx)
+            points[joint][1].append(frame["time"])
+            points[joint][2].append(angle)
+    return {joint: tuple(np.array(values) for values in lists) for joint, lists in points.items()}
+
+
+def _keep_mask(angles):
+    """
+    Marks the points of one joint that have to be sent. The robot holds a joint that a frame
+    leaves out (see trajectory._forward_fill), so only points inside a run of unchanged
+    angles are dropped: the first point of the run starts the hold and its last point
+    starts the next movement. The first and last point are always kept.
+    """
+    keep = np.ones(len(angles), dtype=bool)
+    if len(angles) > 2:
+        keep[1:-1] = (angles[1:-1] != angles[:-2]) | (angles[1:-1] != angles[2:])
+    return keep
+
+
+def max_deviation(original, encoded):
+    """
+    Largest angle difference (rad) between two trajectories, replayed the way the robot
+    runs them: a joint left out of a frame is held, and the frames are linearly
+    interpolated.
+    """
+    joints = list(_joint_points(original))
+    times, angles = _to_matrix(original, joints)
+    angles = _forward_fill(angles)
+    enc_times, enc_angles = _to_matrix(encoded, joints)
+    enc_angles = _forward_fill(enc_angles)
+    deviation = 0.0
+    for col in range(len(joints)):
+        known = ~np.isnan(enc_angles[:, col])
+        if not np.any(known):
+            return float("inf")
+        replay = np.interp(times, enc_times[known], enc_angles[known, col])
+        sent = ~np.isnan(angles[:, col])
+        deviation = max(deviation, float(np.max(np.abs(replay[sent] - angles[sent, col]))))
+    return deviation
+
+
+def encode_frames(frames, angle_resolution=ANGLE_RESOLUTION, time_resolution=TIME_RESOLUTION,
+                  limits=JOINT_LIMITS):
+    """
+    Shrinks a trajectory before it is sent with rom.actuator.motor.write:
+    - times and angles are quantized to the given resolutions (angles stay within limits),
+    - a joint is left out of a frame while it is held (unchanged before and after),
+    - frames left without joints, or at the same quantized time, are merged away.
+
+    The frames are expected to be validated already (see trajectory.retime_frames).
+    Since the robot holds the joints a frame leaves out, the sent angles match the original
+    within angle_resolution / 2 and the result passes validate_frames. Where rounding makes a
+    segment too fast, it is stretched by whole ms, which also shows in max_error.
+
+    Returns:
+        tuple: (encoded frames, stats dict with frames, joint entries and bytes before/after,
+                bytes_saved and max_error in rad)
+    """
+    if len(frames) < 2:
+        return frames, {"frames_in": len(frames), "frames_out": len(frames), "bytes_saved": 0, "max_error": 0.0}
+
+    quantized = []
+    for frame in frames:
+        time_q = int(round(frame["time"] / time_resolution) * time_resolution)
+        data = {}
+        for joint, angle in frame["data"].items():
+            angle = round(angle / angle_resolution) * angle_resolution
+            if joint in limits:
+                angle = min(max(angle, limits[joint][0]), limits[joint][1])
+            data[joint] = round(angle, 4)
+        if quantized and quantized[-1]["time"] == time_q:
+            # Same time after quantization: merge into the previous frame.
+            quantized[-1]["data"].update(data)
+        else:
+            quantized.append({"time": time_q, "data": data})
+    # Rounding can make a segment slightly too fast again; retiming stretches it by whole ms.
+    quantized = [{"time": int(frame["time"]), "data": frame["data"]} for frame in retime_frames(quantized, limits)]
+
+    encoded = [{"time": frame["time"], "data": {}} for frame in quantized]
+    for joint, (indices, _, angles) in _joint_points(quantized).items():
+        keep = _keep_mask(angles)
+        for idx, angle in zip(indices[keep], angles[keep]):
+            encoded[idx]["data"][joint] = float(angle)
+    encoded = [frame for frame in encoded if frame["data"]]
+
+    bytes_in = payload_size(frames)
+    bytes_out = payload_size(encoded)
+    stats = {
+        "frames_in": len(frames),
+        "frames_out": len(encoded),
+        "joints_in": sum(len(frame["data"]) for frame in frames),
+        "joints_out": sum(len(frame["data"]) for frame in encoded),
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+        "bytes_saved": bytes_in - bytes_out,
+        "max_error": max_deviation(frames, encoded)
+    }
+    ENCODING_TOTALS["frames"] += len(frames)
+    ENCODING_TOTALS["bytes_in"] += bytes_in
+    ENCODING_TOTALS["bytes_out"] += bytes_out
+    ENCODING_TOTALS["bytes_saved"] += bytes_in - bytes_out
+    logger.debug("Encoded %d -> %d frames, %d -> %d bytes (max error %.4f rad)",
+                 stats["frames_in"], stats["frames_out"], bytes_in, bytes_out, stats["max_error"])
+    return encoded, stats
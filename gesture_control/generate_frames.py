@@ -1,16 +1,15 @@
 import random
 
 # Only the head and arms, removing legs since they're not being used.
-# Format: joint_name: (min_angle, max_angle, min_time)
-# We'll only use the (min_angle, max_angle) portion for random generation,
-# ignoring 'min_time' here because the final timing adjustments
-# can happen later (e.g. ensure_min_required_time).
+# Format: joint_name: (min_angle, max_angle), used for random generation.
+# The timing limits are checked later against alpha_mini_rug's joint table
+# (see gesture_control.trajectory.retime_frames).
 HW_LIMITS_HEAD_ARMS = {
-    "body.head.yaw": (-0.874, 0.874, 600),
-    "body.head.roll": (-0.174, 0.174, 400),
-    "body.head.pitch": (-0.174, 0.174, 400),
-    "body.arms.left.upper.pitch": (-2.59, 1.59, 1600),
-    "body.arms.right.upper.pitch": (-2.59, 1.59, 1600)
+    "body.head.yaw": (-0.874, 0.874),
+    "body.head.roll": (-0.174, 0.174),
+    "body.head.pitch": (-0.174, 0.174),
+    "body.arms.left.upper.pitch": (-2.59, 1.59),
+    "body.arms.right.upper.pitch": (-2.59, 1.59)
 }
 
 
@@ -0,0 +1,76 @@
+import os
+import json
+import logging
+
+from gesture_control.generate_frames import generate_beat_frames
+from gesture_control.smoothing import smooth_predefined_frames, smooth_keyframes
+from gesture_control.trajectory import retime_frames, validated_library_frames
+from gesture_control.compositor import compose_tracks, repeat_track
+
+# Frame preparation shared by the Twisted and the asyncio say_animated.
+
+logger = logging.getLogger(__name__)
+
+# Load the gesture library once.
+GESTURE_FILE = os.path.join(os.path.dirname(__file__), "../gestures.json")
+try:
+    with open(GESTURE_FILE, "r") as f:
+        GESTURE_LIBRARY = json.load(f)
+    logger.debug("Loaded gesture library with keys: %s", list(GESTURE_LIBRARY.keys()))
+except Exception as e:
+    logger.error("Could not load gesture library: %s", e)
+    GESTURE_LIBRARY = {}
+
+# Seconds of speech per word, used to estimate the TTS duration.
+SECONDS_PER_WORD = 0.4
+
+
+def estimate_speech_duration(text):
+    return len(text.split()) * SECONDS_PER_WORD
+
+
+def _beat_cycle():
+    frames = generate_beat_frames(duration=1000, scale=0.5)
+    return smooth_keyframes(frames, steps=1)
+
+
+def beat_frames():
+    """
+    One iteration of the beat gesture: generated on-the-fly, smoothed and retimed
+    to the joint limits. The last frame time is the movement duration (ms).
+    """
+    return retime_frames(_beat_cycle())
+
+
+def library_frames(gesture_name):
+    """
+    Keyframes of a library gesture, validated against the joint limits (cached) and smoothed.
+    Returns an empty list if the gesture has no keyframes.
+    """
+    frames = validated_library_frames(GESTURE_LIBRARY, gesture_name)
+    if not frames:
+        return []
+    return smooth_predefined_frames(frames, steps=1)
+
+
+def layered_frames(gesture_name, max_duration=None):
+    """
+    A library gesture on its own joints with beat motion on the other joints, merged into
+    one trajectory (sent with a single motor write) and retimed to the joint limits.
+
+    When retiming stretches the merged trajectory past both the gesture itself and
+    max_duration (ms, e.g. the estimated utterance), the plain library gesture is
+    returned instead, so the layering never makes the robot move longer than it speaks.
+    Returns an empty list if the gesture has no keyframes.
+    """
+    frames = library_frames(gesture_name)
+    if not frames:
+        return []
+    beat = repeat_track(_beat_cycle, frames[-1]["time"])
+    layered = retime_frames(compose_tracks([frames, beat]))
+    limit = max(frames[-1]["time"], max_duration or 0)
+    if layered[-1]["time"] > limit:
+        logger.debug("Layered '%s' takes %.0f ms (limit %.0f ms); sending the gesture alone.",
+                     gesture_name, layered[-1]["time"], limit)
+        return frames
+    return layered
@@ -1,15 +1,15 @@
-import os
-import json
 import logging
-import random
 import time
 from twisted.internet.defer import inlineCallbacks
 from autobahn.twisted.util import sleep
-from alpha_mini_rug import perform_movement
 
-# Import the new gesture generation and smoothing functions.
-from gesture_control.generate_frames import generate_beat_frames
-from gesture_control.smoothing import smooth_predefined_frames, smooth_keyframes
+# Gesture generation, smoothing and validation are shared with the asyncio variant.
+from gesture_control.gesture_frames import (
+    GESTURE_LIBRARY, beat_frames, library_frames, layered_frames, estimate_speech_duration
+)
+from gesture_control.trajectory import retime_from_position
+from gesture_control.frame_encoding import encode_frames
+from diagnostics.health import counted, tracked
 
 logging.basicConfig(
     format='%(asctime)s GESTURE HANDLER %(levelname)-8s %(message)s',
@@ -18,37 +18,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load the gesture library once.
-GESTURE_FILE = os.path.join(os.path.dirname(__file__), "../gestures.json")
-try:
-    with open(GESTURE_FILE, "r") as f:
-        GESTURE_LIBRARY = json.load(f)
-    logger.debug("Loaded gesture library with keys: %s", list(GESTURE_LIBRARY.keys()))
-except Exception as e:
-    logger.error("Could not load gesture library: %s", e)
-    GESTURE_LIBRARY = {}
+
+@inlineCallbacks
+def perform_movement(session, frames, mode="linear", sync=False, force=True):
+    """
+    Replaces alpha_mini_rug.perform_movement, which needs every joint in every frame.
+    The frames are retimed from the current joint positions (the same check perform_movement
+    does) and delta encoded, then written to the motors without waiting for the movement.
+    Returns the duration (s) of the movement as sent, which retiming may have stretched.
+    """
+    current_position = yield session.call("rom.sensor.proprio.read")
+    frames = retime_from_position(frames, current_position[0]["data"])
+    frames, _ = encode_frames(frames)
+    session.call("rom.actuator.motor.write", frames=frames, mode=mode, sync=sync, force=force)
+    return frames[-1]["time"] / 1000.0
 
 
+@counted("loop_gesture")
 @inlineCallbacks
-def loop_gesture(session, dialogue_deferred, start_time, estimated_duration):
+def loop_gesture(session, dialogue_deferred, start_time, estimated_duration, barge_in=None):
     """
     Repeatedly perform the given (beat) gesture, optionally with noise, until
     (1) the TTS is finished, or
-    (2) the estimated TTS duration is exceeded.
+    (2) the estimated TTS duration is exceeded, or
+    (3) the user barged in (barge_in.interrupted).
     """
     iteration = 0
-    # movement_duration matches the total duration used in generate_beat_frames
-    movement_duration = 1.0  # 2 seconds
-
-
-    while not dialogue_deferred.called:
-        # 1) Generate on-the-fly
-        logger.debug("Generating beat gesture frames (2s).")
-        frames = generate_beat_frames(duration=1000, scale=0.5)
 
-        # 2) Smooth them
-        frames = smooth_keyframes(frames, steps=1)
-        # logger.debug("Beat frames after smoothing: %s", frames)
+    while not dialogue_deferred.called and not (barge_in and barge_in.interrupted):
+        # Generate on-the-fly, smooth, and enforce joint limits and minimum movement times.
+        logger.debug("Generating beat gesture frames (1s).")
+        frames = beat_frames()
         elapsed = time.time() - start_time
         # logger.debug(
         #     "Loop gesture iteration %d; elapsed time: %.2f (estimated: %.2f)",
@@ -63,8 +63,8 @@ def loop_gesture(session, dialogue_deferred, start_time, estimated_duration):
         iteration += 1
 
 
-        # Perform movement in async mode
-        perform_movement(session, frames, mode="linear", sync=False, force=True)
+        # Perform movement in async mode; movement_duration is the retimed (sent) duration.
+        movement_duration = yield perform_movement(session, frames, mode="linear", sync=False, force=True)
 
         # Wait for it to finish
         yield sleep(movement_duration)
@@ -76,59 +76,90 @@ def loop_gesture(session, dialogue_deferred, start_time, estimated_duration):
 def perform_single_gesture(session, frames):
     # logger.debug("Performing single gesture once with frames: %s", frames)
 
-    perform_movement(session, frames, mode="last", sync=False, force=True)
-    # For example, wait for the final frame's time + some margin:
-    max_time_ms = frames[-1]["time"]
-    yield sleep(max_time_ms / 1000.0)
+    # Wait for the movement as sent (retimed from the current position) to finish.
+    movement_duration = yield perform_movement(session, frames, mode="last", sync=False, force=True)
+    yield sleep(movement_duration)
 
     # logger.debug("Single gesture completed.")
 
 
+@inlineCallbacks
+def watch_barge_in(session, dialogue_deferred, barge_in, poll_interval=0.1):
+    """
+    Polls the voice activity detector while the robot speaks.
+    When the user starts talking, the dialogue is stopped and barge_in.interrupted is set,
+    which also ends loop_gesture.
+    """
+    while not dialogue_deferred.called:
+        if barge_in.voice_detected:
+            logger.debug("User barged in; stopping dialogue.")
+            barge_in.interrupted = True
+            yield session.call("rie.dialogue.stop")
+            break
+        yield sleep(poll_interval)
+
 
+@tracked("say_animated")
 @inlineCallbacks
-def say_animated(session, text, gesture_name=None):
+def say_animated(session, text, gesture_name=None, barge_in=None, layer_beat=False):
     """
     Animated speech:
     - if gesture_name == "beat_gesture", generate frames, smooth them, then loop.
     - if gesture_name is in GESTURE_LIBRARY, run it once, with smoothing if desired.
+      With layer_beat, the beat runs on the joints the gesture leaves free (in the same
+      motor write) and goes on after the gesture until the TTS is done.
     - else skip gestures.
 
     We estimate TTS duration by 0.4s/word and stop the loop if that time is exceeded
     or the TTS finishes earlier, whichever first.
+
+    If barge_in (a VoiceActivityDetector) is given, speech and beat gestures stop as soon
+    as the user starts talking. Returns True if the robot was interrupted.
     """
     # logger.debug("say_animated called with text: '%s' and gesture: %s", text, gesture_name)
 
     # Start TTS
     start_time = time.time()
     dialogue_deferred = session.call("rie.dialogue.say", text=text)
+    if barge_in:
+        barge_in.start()
+        watcher = watch_barge_in(session, dialogue_deferred, barge_in)
 
     # Estimate TTS duration
-    word_count = len(text.split())
-    estimated_duration = word_count * 0.4
+    estimated_duration = estimate_speech_duration(text)
     # logger.debug("Estimated speech duration: %.2f seconds", estimated_duration)
 
     # Decide gesture approach
     if gesture_name == "beat_gesture":
         # Loop until TTS done or estimate exceeded
-        yield loop_gesture(session, dialogue_deferred, start_time, estimated_duration)
+        yield loop_gesture(session, dialogue_deferred, start_time, estimated_duration, barge_in)
 
     elif gesture_name in GESTURE_LIBRARY:
-        # 1) Load from library
-        frames = GESTURE_LIBRARY[gesture_name].get("keyframes", [])
-        if not frames:
-            # logger.warning("Gesture '%s' found in library but has no keyframes!", gesture_name)
-            pass
+        # Load from library (validated against the joint limits, cached) and smooth once.
+        if layer_beat:
+            frames = layered_frames(gesture_name, max_duration=estimated_duration * 1000.0)
         else:
-            # 2) Smooth them once (choose your function or steps).
-            # logger.debug("Iconic frames before smoothing: %s", frames)
-            frames = smooth_predefined_frames(frames, steps=1)
-            # logger.debug("Iconic frames after smoothing: %s", frames)
-
-            # 3) Perform gesture once
+            frames = library_frames(gesture_name)
+        if frames:
+            # Perform gesture once
             yield perform_single_gesture(session, frames)
+            if layer_beat:
+                yield loop_gesture(session, dialogue_deferred, start_time, estimated_duration, barge_in)
     else:
         logger.debug("Gesture '%s' not found or None specified; skipping gesture.", gesture_name)
 
     # Wait for TTS to finish
-    yield dialogue_deferred
+    interrupted = False
+    try:
+        yield dialogue_deferred
+    except Exception as e:
+        # A stopped dialogue may end in an error; that is expected after a barge-in.
+        if not (barge_in and barge_in.interrupted):
+            raise
+        logger.debug("Dialogue ended after barge-in: %s", e)
+    if barge_in:
+        yield watcher
+        barge_in.stop()
+        interrupted = barge_in.interrupted
     logger.debug("Dialogue finished; say_animated complete.")
+    return interrupted
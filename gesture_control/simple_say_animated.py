@@ -7,6 +7,8 @@ import time
 from twisted.internet.defer import inlineCallbacks, DeferredList
 from autobahn.twisted.util import sleep
 from alpha_mini_rug import perform_movement
+from gesture_control.trajectory import retime_frames
+from diagnostics.health import counted
 
 logging.basicConfig(
     format='%(asctime)s GESTURE HANDLER %(levelname)-8s %(message)s',
@@ -64,6 +66,7 @@ def add_noise_to_frames(frames, time_noise=50, angle_noise=0.05):
     return noisy_frames
 
 
+@counted("loop_gesture")
 @inlineCallbacks
 def loop_gesture(session, frames, dialogue_deferred, start_time, estimated_duration):
     """
@@ -82,8 +85,8 @@ def loop_gesture(session, frames, dialogue_deferred, start_time, estimated_durat
         iteration += 1
 
 
-        movement_duration = 2.0
-        noisy_frames = add_noise_to_frames(frames)
+        noisy_frames = retime_frames(add_noise_to_frames(frames))
+        movement_duration = noisy_frames[-1]["time"] / 1000.0
 
         # (2) Start the motion in async mode if your library is truly asynchronous:
         perform_movement(session, noisy_frames, mode="linear", sync=False, force=False)
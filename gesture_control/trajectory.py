@@ -0,0 +1,205 @@
+import logging
+import numpy as np
+
+# The limits alpha_mini_rug's perform_movement checks against (alpha_mini_rug.movements.joints_dic):
+# head and arms, plus the lower arms and torso that the library gestures use.
+# Format: (min_angle, max_angle, min_time). A copy, since importing alpha_mini_rug loads its
+# Twisted modules, which the asyncio flavor cannot import.
+JOINT_LIMITS = {
+    "body.head.yaw": (-0.874, 0.874, 600),
+    "body.head.roll": (-0.174, 0.174, 400),
+    "body.head.pitch": (-0.174, 0.174, 400),
+    "body.arms.right.upper.pitch": (-2.59, 1.59, 1600),
+    "body.arms.right.lower.roll": (-1.74, 0.000064, 700),
+    "body.arms.left.upper.pitch": (-2.59, 1.59, 1600),
+    "body.arms.left.lower.roll": (-1.74, 0.000064, 700),
+    "body.torso.yaw": (-0.874, 0.874, 1000),
+    "body.legs.right.upper.pitch": (-1.73, 1.73, 1000),
+    "body.legs.right.lower.pitch": (-1.5, 1.5, 800),
+    "body.legs.right.foot.roll": (-0.849, 0.249, 800),
+    "body.legs.left.upper.pitch": (-1.73, 1.73, 1000),
+    "body.legs.left.lower.pitch": (-1.5, 1.5, 800),
+    "body.legs.left.foot.roll": (-0.849, 0.249, 800)
+}
+
+logger = logging.getLogger(__name__)
+
+# Validated library gestures, keyed by gesture name.
+_LIBRARY_CACHE = {}
+
+
+def _to_matrix(frames, joints):
+    """
+    Converts a list of frames into a (times, angles) pair of arrays.
+    Joints that a frame does not mention are NaN in the angle matrix.
+    """
+    times = np.array([float(frame.get("time", 0.0)) for frame in frames])
+    angles = np.full((len(frames), len(joints)), np.nan)
+    for row, frame in enumerate(frames):
+        data = frame.get("data", {})
+        for col, joint in enumerate(joints):
+            if joint in data:
+                angles[row, col] = data[joint]
+    return times, angles
+
+
+def _forward_fill(angles):
+    """
+    Replaces NaN entries by the last known angle of the same joint,
+    since the robot holds a joint where a frame leaves it out.
+    """
+    valid = ~np.isnan(angles)
+    index = np.where(valid, np.arange(angles.shape[0])[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    return angles[index, np.arange(angles.shape[1])]
+
+
+def _limit_arrays(joints, limits):
+    """
+    Returns the min angle, max angle and max velocity (rad/ms) per joint.
+    The min_time of a joint is the time it needs to move through its full range.
+    """
+    low = np.array([limits[j][0] for j in joints])
+    high = np.array([limits[j][1] for j in joints])
+    max_velocity = (high - low) / np.array([limits[j][2] for j in joints])
+    return low, high, max_velocity
+
+
+def _limited_joints(frames, limits):
+    joints = []
+    for frame in frames:
+        for joint in frame.get("data", {}):
+            if joint in limits and joint not in joints:
+                joints.append(joint)
+    return joints
+
+
+def validate_frames(frames, limits=JOINT_LIMITS):
+    """
+    Checks a trajectory against the per-joint angle limits and minimum movement times.
+
+    Joints without an entry in `limits` are not checked.
+
+    Args:
+        frames (list): A list of dicts: {"time": ..., "data": {...}}
+        limits (dict): joint_name: (min_angle, max_angle, min_time)
+
+    Returns:
+        list: One dict per violation, e.g.
+              {"type": "angle", "frame": 2, "joint": ..., "value": ...} or
+              {"type": "speed", "frame": 2, "required": ..., "actual": ...}.
+              An empty list means the trajectory can be sent as is.
+    """
+    joints = _limited_joints(frames, limits)
+    if not frames or not joints:
+        return []
+
+    times, angles = _to_matrix(frames, joints)
+    low, high, max_velocity = _limit_arrays(joints, limits)
+    violations = []
+
+    with np.errstate(invalid="ignore"):
+        out_of_range = (angles < low) | (angles > high)
+    for row, col in zip(*np.nonzero(out_of_range)):
+        violations.append({
+            "type": "angle",
+            "frame": int(row),
+            "joint": joints[col],
+            "value": float(angles[row, col])
+        })
+
+    required, actual = _segment_durations(times, angles, max_velocity)
+    for seg in np.nonzero(actual < required - 1e-6)[0]:
+        violations.append({
+            "type": "speed",
+            "frame": int(seg) + 1,
+            "required": round(float(required[seg]), 3),
+            "actual": round(float(actual[seg]), 3)
+        })
+    return violations
+
+
+def _segment_durations(times, angles, max_velocity):
+    """
+    Returns the required and actual duration (ms) of every segment between two frames.
+    """
+    filled = _forward_fill(angles)
+    deltas = np.abs(np.diff(filled, axis=0))
+    # Joints that are not yet defined (NaN) do not move.
+    deltas = np.nan_to_num(deltas, nan=0.0)
+    required = (deltas / max_velocity).max(axis=1, initial=0.0)
+    actual = np.diff(times)
+    return required, actual
+
+
+def retime_frames(frames, limits=JOINT_LIMITS):
+    """
+    Returns a copy of the trajectory that the robot can execute as is:
+    - out-of-range angles are clamped to the joint limits,
+    - segments that are too fast are stretched in time (later frames shift along).
+
+    Angles and times are rounded to 3 decimals like the smoothing functions do.
+
+    Args:
+        frames (list): A list of dicts: {"time": ..., "data": {...}}
+        limits (dict): joint_name: (min_angle, max_angle, min_time)
+
+    Returns:
+        list: new list of frames.
+    """
+    joints = _limited_joints(frames, limits)
+    if not frames or not joints:
+        return [{"time": f.get("time", 0.0), "data": dict(f.get("data", {}))} for f in frames]
+
+    times, angles = _to_matrix(frames, joints)
+    low, high, max_velocity = _limit_arrays(joints, limits)
+
+    # Clamping first, so the speed check sees the angles that are actually sent.
+    angles = np.clip(angles, low, high)
+    required, actual = _segment_durations(times, angles, max_velocity)
+    stretched = int(np.count_nonzero(actual < required))
+    # Whole milliseconds, so rounding cannot make a stretched segment too fast again.
+    durations = np.maximum(actual, np.ceil(required))
+    new_times = np.concatenate(([times[0]], times[0] + np.cumsum(durations)))
+
+    if stretched:
+        logger.debug("Stretched %d segment(s); duration %.0f -> %.0f ms",
+                     stretched, times[-1] - times[0], new_times[-1] - new_times[0])
+
+    columns = {joint: col for col, joint in enumerate(joints)}
+    retimed = []
+    for row, frame in enumerate(frames):
+        data = {}
+        for joint, angle in frame.get("data", {}).items():
+            if joint in columns:
+                angle = float(angles[row, columns[joint]])
+            data[joint] = round(angle, 3)
+        retimed.append({"time": round(float(new_times[row]), 3), "data": data})
+    return retimed
+
+
+def validated_library_frames(gesture_library, gesture_name, limits=JOINT_LIMITS):
+    """
+    Returns the retimed keyframes of a library gesture.
+    The result is cached per gesture name, since the library is loaded once.
+    """
+    if gesture_name not in _LIBRARY_CACHE:
+        frames = gesture_library.get(gesture_name, {}).get("keyframes", [])
+        violations = validate_frames(frames, limits)
+        if violations:
+            logger.debug("Gesture '%s' has %d limit violation(s); retiming.",
+                         gesture_name, len(violations))
+        _LIBRARY_CACHE[gesture_name] = retime_frames(frames, limits)
+    return _LIBRARY_CACHE[gesture_name]
+
+
+def retime_from_position(frames, current_data, limits=JOINT_LIMITS):
+    """
+    Retimes the frames as a continuation of the current joint positions (as read from
+    rom.sensor.proprio.read), so the first frame is not reached faster than the joints allow.
+    """
+    start_frame = {
+        "time": 0.0,
+        "data": {joint: current_data[joint] for joint in frames[0]["data"] if joint in current_data}
+    }
+    return retime_frames([start_frame] + frames, limits)[1:]
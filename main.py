@@ -2,8 +2,16 @@ from autobahn.twisted.component import Component, run
 from twisted.internet.defer import inlineCallbacks
 from autobahn.twisted.util import sleep
 from twisted.internet.task import LoopingCall
+from twisted.internet.threads import deferToThread
 from game_control.play_game import play_game
 from alpha_mini_rug.speech_to_text import SpeechToText
+from speech_control.voice_activity import VoiceActivityDetector
+from speech_control.audio_buffer import AudioRingBuffer
+from diagnostics.health import get_monitor
+from api.backends import get_backend
+from gesture_control.frame_encoding import ENCODING_TOTALS
+from api.opening_book import get_opening_book
+from game_control.speculation import SPECULATION_TOTALS
 import logging
 
 # Set up logging
@@ -15,14 +23,31 @@ stt = SpeechToText()
 stt.silence_time = 1.0
 stt.silence_threshold2 = 200
 stt.logging = False
+# Early LLM dispatch: a 0.4 s pause already gives a partial transcript, on which the
+# games start their LLM request before the final transcript (after stt.silence_time) is in.
+EARLY_DISPATCH = True
+# Preallocated ring buffer the hearing stream is written into, in front of the STT.
+audio_buffer = AudioRingBuffer(stt, capacity_seconds=30.0, partial_silence_time=0.4 if EARLY_DISPATCH else None)
+
+# Barge-in: let the user interrupt the robot. The threshold (RMS level) must stay
+# above the level at which the microphone picks up the robot's own voice.
+BARGE_IN = True
+vad = VoiceActivityDetector(threshold=1500, min_speech_time=0.3)
+
+def recognize():
+    # Both recognizers write the same temporary wav file, so they run one after the other.
+    audio_buffer.process_partial()
+    stt.loop()
 
 def process_audio():
     """
     Continuously processes buffered audio data.
     We call only stt.loop() so that the new words remain available
-    for wait_for_response to pick up.
+    for wait_for_response to pick up; partial transcripts are recognized first.
+    Speech recognition blocks, so it runs in a worker thread; the LoopingCall waits
+    for it before the next run.
     """
-    stt.loop()
+    return deferToThread(recognize)
 
 @inlineCallbacks
 def main(session, details):
@@ -31,6 +56,17 @@ def main(session, details):
     Configures the microphone, subscribes to and starts the audio stream,
     launches a concurrent audio processing loop, and starts the guessing game.
     """
+    # Reactor health: lag sampling, in-flight WAMP calls and stalls, queryable as "game.health".
+    monitor = get_monitor()
+    monitor.start()
+    monitor.instrument_session(session)
+    monitor.add_stats("llm_latency", lambda: get_backend().latency_summary())
+    monitor.add_stats("frame_encoding", lambda: dict(ENCODING_TOTALS))
+    monitor.add_stats("audio_buffer", audio_buffer.stats)
+    monitor.add_stats("speculation", lambda: dict(SPECULATION_TOTALS))
+    monitor.add_stats("opening_book", lambda: get_opening_book().stats() if get_opening_book() else None)
+    yield monitor.register(session)
+
     # Optional behavior: play an initial animation.
     yield session.call("rom.optional.behavior.play", name="BlocklyCrouch")
     yield session.call("rie.dialogue.say", text="Initializing the game...")
@@ -41,7 +77,9 @@ def main(session, details):
     yield session.call("rie.dialogue.config.language", lang="en")
 
     # Subscribe to the microphone stream for continuous STT updates.
-    yield session.subscribe(stt.listen_continues, "rom.sensor.hearing.stream")
+    yield session.subscribe(audio_buffer.listen, "rom.sensor.hearing.stream")
+    if BARGE_IN:
+        yield session.subscribe(vad.listen, "rom.sensor.hearing.stream")
 
     # Start the microphone stream.
     yield session.call("rom.sensor.hearing.stream")
@@ -52,7 +90,8 @@ def main(session, details):
     audio_loop.start(0.5)  # Process audio every 0.5 seconds.
 
     # Start the guessing game, passing the shared STT instance.
-    yield play_game(session, stt)
+    yield play_game(session, stt, barge_in=vad if BARGE_IN else None,
+                    partials=audio_buffer if EARLY_DISPATCH else None)
 
     # Keep the session alive.
     while True:
@@ -0,0 +1,105 @@
+import asyncio
+from autobahn.asyncio.component import Component, run
+from game_control.async_play_game import play_game
+from speech_control.speech_to_text import SpeechToText
+from speech_control.voice_activity import VoiceActivityDetector
+from speech_control.audio_buffer import AudioRingBuffer
+from diagnostics.health import get_monitor
+from api.backends import get_backend
+from gesture_control.frame_encoding import ENCODING_TOTALS
+from api.opening_book import get_opening_book
+from game_control.speculation import SPECULATION_TOTALS
+import logging
+
+# asyncio flavor of main.py: same game, on autobahn.asyncio.
+# uvloop is used when it is installed.
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    uvloop = None
+
+# Set up logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Initialize a single SpeechToText instance
+stt = SpeechToText()
+stt.silence_time = 1.0
+stt.silence_threshold2 = 200
+stt.logging = False
+# Early LLM dispatch: a 0.4 s pause already gives a partial transcript, on which the
+# games start their LLM request before the final transcript (after stt.silence_time) is in.
+EARLY_DISPATCH = True
+# Preallocated ring buffer the hearing stream is written into, in front of the STT.
+audio_buffer = AudioRingBuffer(stt, capacity_seconds=30.0, partial_silence_time=0.4 if EARLY_DISPATCH else None)
+
+# Barge-in, see main.py.
+BARGE_IN = True
+vad = VoiceActivityDetector(threshold=1500, min_speech_time=0.3)
+
+
+async def process_audio():
+    """
+    Processes buffered audio data every 0.5 seconds.
+    stt.loop() runs the (blocking) speech recognition, so it runs in a worker
+    thread to keep the event loop responsive.
+    """
+    while True:
+        await asyncio.to_thread(audio_buffer.process_partial)
+        await asyncio.to_thread(stt.loop)
+        await asyncio.sleep(0.5)
+
+
+async def main(session, details):
+    """
+    Main function called when the WAMP session is joined, see main.py.
+    """
+    logger.debug("Event loop: %s", "uvloop" if uvloop else "asyncio")
+    # In-flight WAMP calls and gesture loops, queryable as "game.health" (no lag sampling here).
+    monitor = get_monitor()
+    monitor.instrument_session(session)
+    monitor.add_stats("llm_latency", lambda: get_backend().latency_summary())
+    monitor.add_stats("frame_encoding", lambda: dict(ENCODING_TOTALS))
+    monitor.add_stats("audio_buffer", audio_buffer.stats)
+    monitor.add_stats("speculation", lambda: dict(SPECULATION_TOTALS))
+    monitor.add_stats("opening_book", lambda: get_opening_book().stats() if get_opening_book() else None)
+    await monitor.register(session)
+    await session.call("rom.optional.behavior.play", name="BlocklyCrouch")
+    await session.call("rie.dialogue.say", text="Initializing the game...")
+    await asyncio.sleep(2)
+
+    # Configure the microphone sensitivity and language.
+    await session.call("rom.sensor.hearing.sensitivity", 1650)
+    await session.call("rie.dialogue.config.language", lang="en")
+
+    # Subscribe to the microphone stream for continuous STT updates.
+    await session.subscribe(audio_buffer.listen, "rom.sensor.hearing.stream")
+    if BARGE_IN:
+        await session.subscribe(vad.listen, "rom.sensor.hearing.stream")
+
+    # Start the microphone stream.
+    await session.call("rom.sensor.hearing.stream")
+    logger.debug("Audio stream started.")
+
+    audio_loop = asyncio.create_task(process_audio())
+    try:
+        await play_game(session, stt, barge_in=vad if BARGE_IN else None,
+                        partials=audio_buffer if EARLY_DISPATCH else None)
+    finally:
+        audio_loop.cancel()
+
+# Configure the WAMP component.
+wamp = Component(
+    transports=[{
+        "url": "ws://wamp.robotsindeklas.nl",
+        "serializers": ["msgpack"],
+        "max_retries": 0
+    }],
+    realm="rie.67c581ea99b259cf43b013a0",
+)
+
+wamp.on_join(main)
+
+if __name__ == "__main__":
+    run([wamp])
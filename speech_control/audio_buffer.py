@@ -0,0 +1,205 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity ingest buffer between "rom.sensor.hearing.stream" and SpeechToText.
+
+    It is subscribed to the hearing stream in place of stt.listen_continues and does the
+    same job in constant memory: the audio is written into one preallocated int16 ring,
+    silence is detected the same way (with stt's silence_threshold2, silence_time and
+    sample_rate), and a finished utterance is handed to the recognizer as views into the
+    ring (stt.to_process_frames), which stt.loop() picks up as before.
+
+    An utterance handed to the recognizer is not overwritten until stt.processing is reset.
+    When the ring is full, the oldest audio of the utterance being recorded is dropped. While
+    partial_stt is still reading that utterance (or the pending utterances fill the ring) it
+    cannot be, and the start of the incoming chunk is dropped instead. overflow_samples /
+    overflow_events count all dropped audio, overflow_incoming_samples the incoming part of
+    it; high_water is the largest fill seen.
+
+    With partial_silence_time (shorter than stt.silence_time), a pause in a voiced utterance
+    also hands the utterance so far to a second recognizer (partial_stt). process_partial()
+    runs it and passes the words to the partial listeners, before the final transcript is
+    ready; see game_control.speculation.
+    """
+
+    def __init__(self, stt, capacity_seconds=30.0, partial_silence_time=None):
+        self.stt = stt
+        self.partial_silence_time = partial_silence_time
+        self.partial_stt = None
+        if partial_silence_time:
+            self.partial_stt = type(stt)()
+            self.partial_stt.silence_threshold2 = stt.silence_threshold2
+            self.partial_stt.logging = stt.logging
+        self.partial_listeners = []
+        self.capacity = int(stt.sample_rate * capacity_seconds)
+        self._ring = np.zeros(self.capacity, dtype=np.int16)
+        # Absolute sample positions; the ring index is position % capacity.
+        self.write_pos = 0
+        self.utterance_start = 0
+        self.pending = None  # (start, end) of the utterance the recognizer is working on.
+        self.partial_pending = None  # (start, end) of the partial utterance partial_stt is working on.
+        self.silence_counter = 0
+        self.utterance_voiced = False
+        self.partial_armed = True
+
+        self.high_water = 0
+        self.overflow_samples = 0
+        self.overflow_events = 0
+        self.overflow_incoming_samples = 0
+        self.chunks = 0
+        self.utterances = 0
+        self.partials = 0
+
+    @property
+    def fill(self):
+        """
+        Samples in use: the pending utterance (if any) up to the write position.
+        """
+        start = self.pending[0] if self.pending else self.utterance_start
+        if self.partial_pending:
+            start = min(start, self.partial_pending[0])
+        return self.write_pos - start
+
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "fill": self.fill,
+            "high_water": self.high_water,
+            "overflow_samples": self.overflow_samples,
+            "overflow_events": self.overflow_events,
+            "overflow_incoming_samples": self.overflow_incoming_samples,
+            "chunks": self.chunks,
+            "utterances": self.utterances,
+            "partials": self.partials
+        }
+
+    def _views(self, start, end):
+        """
+        The samples between two absolute positions as one or two views into the ring (no copy).
+        """
+        first, last = start % self.capacity, end % self.capacity
+        if end - start == 0:
+            return []
+        if first < last:
+            return [self._ring[first:last]]
+        return [view for view in (self._ring[first:], self._ring[:last]) if view.size]
+
+    def _make_room(self, size):
+        """
+        Drops the oldest samples of the current utterance until `size` samples fit (unless
+        partial_stt is still reading them). Returns how many of the incoming samples fit;
+        _write drops the rest from the start of the chunk.
+        """
+        free = self.capacity - self.fill
+        if free >= size:
+            return size
+        drop = 0 if self.partial_pending else min(size - free, self.write_pos - self.utterance_start)
+        if drop:
+            self.utterance_start += drop
+            free += drop
+        incoming = max(0, size - free)
+        lost = drop + incoming
+        if lost:
+            self.overflow_samples += lost
+            self.overflow_incoming_samples += incoming
+            self.overflow_events += 1
+            if self.overflow_events == 1 or self.overflow_events % 100 == 0:
+                logger.warning("Audio buffer full; dropped %d samples. Stats: %s", lost, self.stats())
+        return min(size, free)
+
+    def _write(self, audio):
+        size = self._make_room(audio.size)
+        if size < audio.size:
+            audio = audio[audio.size - size:]
+        index = self.write_pos % self.capacity
+        head = min(size, self.capacity - index)
+        self._ring[index:index + head] = audio[:head]
+        self._ring[:size - head] = audio[head:]
+        self.write_pos += size
+        self.high_water = max(self.high_water, self.fill)
+
+    def _update_silence(self, audio):
+        """
+        Same counter as SpeechToText.listen_continues (+1 per quiet sample, -1 per loud
+        sample, never below 0), computed over the whole chunk at once.
+        """
+        steps = np.where(np.abs(audio.astype(np.int32)) < self.stt.silence_threshold2, 1, -1)
+        self.utterance_voiced = self.utterance_voiced or bool(np.any(steps < 0))
+        walk = self.silence_counter + np.cumsum(steps)
+        self.silence_counter = int(walk[-1] - min(0, walk.min()))
+
+    def listen(self, data):
+        """
+        Handler for the hearing stream, in place of stt.listen_continues.
+        """
+        stt = self.stt
+        if self.pending and not stt.processing:
+            self.pending = None
+        if self.partial_pending and not self.partial_stt.processing:
+            self.partial_pending = None
+        if not stt.do_speech_recognition:
+            self.utterance_start = self.write_pos
+            return
+        stt.mode_continues = True
+        frame_single = data["data"]["body.head"]
+        if frame_single is None:
+            return
+        audio = np.frombuffer(frame_single, dtype=np.int16)
+        if audio.size == 0:
+            return
+        self.chunks += 1
+        self._write(audio)
+        self._update_silence(audio)
+
+        min_silence_samples = int(stt.sample_rate * stt.silence_time)
+        if self.silence_counter > min_silence_samples and not stt.processing:
+            self.silence_counter = 0
+            self.pending = (self.utterance_start, self.write_pos)
+            self.utterance_start = self.write_pos
+            self.utterance_voiced = False
+            self.partial_armed = True
+            self.utterances += 1
+            stt.processing = True
+            stt.to_process_frames.append(self._views(*self.pending))
+        elif self.partial_stt is not None:
+            self._check_partial()
+
+    def _check_partial(self):
+        partial_silence_samples = int(self.stt.sample_rate * self.partial_silence_time)
+        if self.silence_counter < partial_silence_samples:
+            # Speech (re)started: the next pause gives a new partial.
+            self.partial_armed = True
+        elif self.partial_armed and self.utterance_voiced and not self.partial_stt.processing:
+            self.partial_armed = False
+            self.partial_pending = (self.utterance_start, self.write_pos)
+            self.partials += 1
+            self.partial_stt.mode_continues = True
+            self.partial_stt.processing = True
+            self.partial_stt.to_process_frames.append(self._views(*self.partial_pending))
+
+    def add_partial_listener(self, listener):
+        self.partial_listeners.append(listener)
+
+    def remove_partial_listener(self, listener):
+        if listener in self.partial_listeners:
+            self.partial_listeners.remove(listener)
+
+    def process_partial(self):
+        """
+        Runs the partial recognizer (like stt.loop()) and calls the partial listeners with
+        the recognized words of the utterance so far. Call it from the audio processing loop.
+        """
+        if self.partial_stt is None or not self.partial_stt.processing:
+            return
+        self.partial_stt.loop()
+        words = self.partial_stt.give_me_words()
+        self.partial_stt.english_words = []
+        if words:
+            logger.debug("Partial transcript: %s", " ".join(words))
+            for listener in list(self.partial_listeners):
+                listener(words)
@@ -0,0 +1,26 @@
+import sys
+import importlib.util
+
+# alpha_mini_rug's SpeechToText for the asyncio flavor.
+# Importing alpha_mini_rug.speech_to_text runs the package __init__, which imports its
+# Twisted modules (movements imports autobahn.twisted); that fails once autobahn.asyncio
+# is loaded. The speech_to_text module itself does not use Twisted, so it is loaded from
+# its file without the package.
+
+
+def _load_module():
+    module = sys.modules.get("alpha_mini_rug.speech_to_text")
+    if module is not None:
+        return module
+    package = importlib.util.find_spec("alpha_mini_rug")
+    if package is None or not package.submodule_search_locations:
+        raise ImportError("alpha_mini_rug is not installed")
+    location = next(iter(package.submodule_search_locations))
+    spec = importlib.util.spec_from_file_location("_alpha_mini_rug_speech_to_text",
+                                                  f"{location}/speech_to_text.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+SpeechToText = _load_module().SpeechToText
@@ -0,0 +1,62 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VoiceActivityDetector:
+    """
+    Energy based voice activity detector for barge-in.
+
+    It is subscribed to "rom.sensor.hearing.stream" next to the SpeechToText instance and
+    only looks at the audio while the robot is speaking (between start() and stop()).
+    Audio frames whose RMS level exceeds `threshold` count as speech; once
+    `min_speech_time` seconds of speech have been heard, voice_detected is set.
+    Quiet frames count back down, like the silence counter of SpeechToText.
+    """
+
+    def __init__(self, threshold=1500, min_speech_time=0.3, sample_rate=16000):
+        self.threshold = threshold
+        self.min_speech_samples = int(sample_rate * min_speech_time)
+        self.speech_samples = 0
+        self.monitoring = False
+        self.voice_detected = False
+        # Set by say_animated when the robot was interrupted; consumed by wait_for_response.
+        self.interrupted = False
+
+    def start(self):
+        """
+        Starts monitoring for a new robot utterance.
+        """
+        self.speech_samples = 0
+        self.voice_detected = False
+        self.interrupted = False
+        self.monitoring = True
+
+    def stop(self):
+        """
+        Stops monitoring; interrupted stays set until wait_for_response picks it up.
+        """
+        self.monitoring = False
+
+    def listen(self, data):
+        """
+        Handler for the hearing stream. Expects the audio at data["data"]["body.head"]
+        as 16 bit PCM, like SpeechToText.listen_continues.
+        """
+        if not self.monitoring:
+            return
+        frame_single = data["data"]["body.head"]
+        if frame_single is None:
+            return
+        audio_np = np.frombuffer(frame_single, dtype=np.int16)
+        if audio_np.size == 0:
+            return
+        rms = np.sqrt(np.mean(audio_np.astype(np.float32) ** 2))
+        if rms > self.threshold:
+            self.speech_samples += audio_np.size
+        else:
+            self.speech_samples = max(0, self.speech_samples - audio_np.size)
+        if not self.voice_detected and self.speech_samples >= self.min_speech_samples:
+            logger.debug("Voice activity detected (rms %.0f).", rms)
+            self.voice_detected = True
@@ -0,0 +1,46 @@
+import numpy as np
+
+from speech_control.audio_buffer import AudioRingBuffer
+
+
+class FakeSpeechToText:
+    sample_rate = 100
+    silence_threshold2 = 100
+    silence_time = 0.5
+    logging = False
+
+    def __init__(self):
+        self.processing = False
+        self.do_speech_recognition = True
+        self.mode_continues = False
+        self.to_process_frames = []
+
+
+def _chunk(size, value=1000):
+    return {"data": {"body.head": np.full(size, value, dtype=np.int16).tobytes()}}
+
+
+def test_full_buffer_drops_oldest_audio():
+    buffer = AudioRingBuffer(FakeSpeechToText(), capacity_seconds=1.0)
+    buffer.listen(_chunk(80, 1000))
+    buffer.listen(_chunk(40, 2000))
+    assert buffer.fill == 100
+    assert buffer.overflow_samples == 20
+    assert buffer.overflow_incoming_samples == 0
+    audio = np.concatenate(buffer._views(buffer.utterance_start, buffer.write_pos))
+    assert list(audio[:60]) == [1000] * 60
+    assert list(audio[60:]) == [2000] * 40
+
+
+def test_full_buffer_drops_incoming_audio_while_partial_pending():
+    buffer = AudioRingBuffer(FakeSpeechToText(), capacity_seconds=1.0, partial_silence_time=0.2)
+    buffer.listen(_chunk(80, 1000))
+    buffer.partial_stt.processing = True
+    buffer.partial_pending = (0, 80)
+    buffer.listen(_chunk(40, 2000))
+    assert buffer.fill == 100
+    assert buffer.overflow_samples == 20
+    assert buffer.overflow_incoming_samples == 20
+    audio = np.concatenate(buffer._views(0, buffer.write_pos))
+    assert list(audio[:80]) == [1000] * 80
+    assert buffer.stats()["overflow_incoming_samples"] == 20
@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from api.backends import LLMBackend, StubBackend
+
+
+def test_backend_without_create_cannot_be_instantiated():
+    class IncompleteBackend(LLMBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
+
+
+def test_stub_complete_records_metrics():
+    backend = StubBackend()
+    messages = [{"role": "user", "content": "The secret word is 'apple'. Question: is it an apple?"}]
+    result = backend.complete(messages, call_type="answer")
+    assert result["text"] == "yes"
+    assert result["model"] == backend.model
+    assert backend.latency_summary()["calls"] == 1
+
+
+def test_stub_acomplete_matches_complete():
+    messages = [{"role": "user", "content": "Think of a word."}]
+    result = asyncio.run(StubBackend().acomplete(messages, call_type="secret_word"))
+    assert result["text"] == StubBackend().complete(messages, call_type="secret_word")["text"]
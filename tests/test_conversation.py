@@ -0,0 +1,66 @@
+from api.api_handler import LOW_BUDGET_HISTORY, guess_messages
+from api.conversation import GuessConversation, START_MESSAGE
+
+
+def _play(conversation, rounds):
+    for idx in range(rounds):
+        conversation.add_round(f"Question {idx}?", "no")
+
+
+def _questions(messages):
+    return [m["content"] for m in messages if m["role"] == "assistant"]
+
+
+def test_rounds_are_appended():
+    conversation = GuessConversation(compact_after=0)
+    _play(conversation, 2)
+    assert conversation.messages[1]["content"] == START_MESSAGE
+    assert _questions(conversation.messages) == ["<<<Question 0?>>>", "<<<Question 1?>>>"]
+    assert conversation.messages[-1] == {"role": "user", "content": "Feedback: no"}
+
+
+def test_compact_folds_rounds_into_summary():
+    conversation = GuessConversation(compact_after=3)
+    _play(conversation, 4)
+    assert len(conversation.messages) == 2
+    assert "4. Question: Question 3? | Feedback: no" in conversation.messages[1]["content"]
+    assert conversation.compacted_rounds == 4
+
+
+def test_trim_keeps_last_rounds():
+    conversation = GuessConversation(compact_after=0)
+    _play(conversation, 7)
+    conversation.trim(3)
+    assert conversation.messages[1]["content"] == START_MESSAGE
+    assert _questions(conversation.messages) == [f"<<<Question {idx}?>>>" for idx in (4, 5, 6)]
+    conversation.add_round("Question 7?", "yes")
+    conversation.trim(3)
+    assert _questions(conversation.messages) == [f"<<<Question {idx}?>>>" for idx in (5, 6, 7)]
+
+
+def test_trim_within_budget_is_a_no_op():
+    conversation = GuessConversation(compact_after=0)
+    _play(conversation, 3)
+    messages = list(conversation.messages)
+    conversation.trim(3)
+    assert conversation.messages == messages
+
+
+def test_trim_after_compaction_keeps_summary():
+    conversation = GuessConversation(compact_after=3)
+    _play(conversation, 4)
+    summary = conversation.messages[1]
+    conversation.trim(3)
+    assert conversation.messages[1] == summary
+    _play(conversation, 2)
+    conversation.trim(1)
+    assert conversation.messages[1] == summary
+    assert len(_questions(conversation.messages)) == 1
+
+
+def test_low_budget_sends_last_rounds():
+    previous_guesses = [{'guess': f"Question {idx}?", 'feedback': "no"} for idx in range(7)]
+    conversation = GuessConversation(compact_after=0)
+    messages = guess_messages(previous_guesses, "low", conversation)
+    assert len(_questions(messages)) == LOW_BUDGET_HISTORY
+    assert len(conversation.rounds) == 7
@@ -0,0 +1,40 @@
+import pytest
+
+from gesture_control.frame_encoding import ANGLE_RESOLUTION, encode_frames, max_deviation
+from gesture_control.gesture_frames import GESTURE_LIBRARY, beat_frames, library_frames
+from gesture_control.trajectory import validate_frames
+
+
+@pytest.mark.parametrize("gesture_name", [None] + sorted(GESTURE_LIBRARY))
+def test_round_trip_error_within_resolution(gesture_name):
+    frames = beat_frames() if gesture_name is None else library_frames(gesture_name)
+    encoded, stats = encode_frames(frames)
+    assert validate_frames(encoded) == []
+    assert stats["max_error"] <= ANGLE_RESOLUTION / 2 + 1e-9
+    assert stats["max_error"] == max_deviation(frames, encoded)
+    assert encoded[-1]["time"] == round(frames[-1]["time"])
+
+
+def test_held_joints_are_left_out():
+    frames = [
+        {"time": 0, "data": {"body.head.yaw": 0.0, "body.torso.yaw": 0.1}},
+        {"time": 1000, "data": {"body.head.yaw": 0.0, "body.torso.yaw": 0.2}},
+        {"time": 2000, "data": {"body.head.yaw": 0.0, "body.torso.yaw": 0.3}},
+        {"time": 3000, "data": {"body.head.yaw": 0.3, "body.torso.yaw": 0.3}}
+    ]
+    encoded, stats = encode_frames(frames)
+    assert [sorted(frame["data"]) for frame in encoded] == [
+        ["body.head.yaw", "body.torso.yaw"],
+        ["body.torso.yaw"],
+        ["body.head.yaw", "body.torso.yaw"],
+        ["body.head.yaw", "body.torso.yaw"]
+    ]
+    assert stats["joints_out"] == stats["joints_in"] - 1
+    assert stats["max_error"] == 0.0
+
+
+def test_short_trajectory_is_returned_unchanged():
+    frames = [{"time": 0, "data": {"body.head.yaw": 0.1234}}]
+    encoded, stats = encode_frames(frames)
+    assert encoded is frames
+    assert stats["max_error"] == 0.0
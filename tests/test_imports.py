@@ -0,0 +1,29 @@
+import os
+import sys
+import subprocess
+import importlib.util
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+needs_alpha_mini_rug = pytest.mark.skipif(importlib.util.find_spec("alpha_mini_rug") is None,
+                                          reason="alpha_mini_rug is not installed")
+
+
+def _import_in_fresh_interpreter(module):
+    # txaio can only be set to one framework per process, so every flavor gets its own.
+    return subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT_DIR,
+                          capture_output=True, text=True, timeout=60)
+
+
+@needs_alpha_mini_rug
+def test_main_asyncio_imports():
+    result = _import_in_fresh_interpreter("main_asyncio")
+    assert result.returncode == 0, result.stderr
+
+
+@needs_alpha_mini_rug
+def test_main_imports():
+    result = _import_in_fresh_interpreter("main")
+    assert result.returncode == 0, result.stderr
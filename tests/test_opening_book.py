@@ -0,0 +1,33 @@
+from api.opening_book import OpeningBook, classify_feedback, history_key, round_key
+from game_control.game_logic import NO_RESPONSE
+
+
+def test_classify_feedback():
+    assert classify_feedback("Yes") == "yes"
+    assert classify_feedback("yeah, sure.") == "yes"
+    assert classify_feedback("No") == "no"
+    assert classify_feedback("nope it's not") == "no"
+    assert classify_feedback("maybe") == "other"
+    assert classify_feedback("yes and no") == "other"
+
+
+def test_no_response_is_other():
+    assert classify_feedback(NO_RESPONSE) == "other"
+    assert classify_feedback(NO_RESPONSE.upper() + ".") == "other"
+    # Only the sentinel itself, not any answer that mentions a response.
+    assert classify_feedback("no, the response is wrong") == "no"
+
+
+def test_build_and_lookup_use_the_same_keys():
+    game = [
+        {'guess': "Is it an animal?", 'feedback': "no"},
+        {'guess': "Is it alive?", 'feedback': NO_RESPONSE},
+        {'guess': "Can you eat it?", 'feedback': "yes"}
+    ]
+    book = OpeningBook.build([game] * 3, min_count=3)
+    assert history_key(game[:1]) == (round_key("is it an animal", "No."),)
+    assert book.lookup([]) == "Is it an animal?"
+    assert book.lookup(game[:2]) == "Can you eat it?"
+    assert book.lookup([game[0], {'guess': "Is it alive?", 'feedback': "no"}]) is None
+    assert book.coverage([game]) == (3, 3)
+    assert book.stats() == {"entries": 3, "hits": 2, "misses": 1}